@@ -1,19 +1,54 @@
-from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.websockets import WebSocketClose
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
 import os
 import logging
 import asyncio
-import json
+import functools
+import hashlib
+import hmac
+import importlib.util
+import ipaddress
+import math
+import re
+import socket
+import time
 import uuid
-from datetime import datetime, timedelta
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import Annotated, AsyncIterator, List, Dict, Optional, Union
 import httpx
+import numpy as np
+import orjson
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
+try:
+    import msgpack
+except ImportError:  # binary live frames are optional
+    msgpack = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # brotli is optional; responses fall back to gzip
+    BrotliMiddleware = None
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # the shared backplane is optional
+    aioredis = None
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -22,8 +57,326 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# JSON serialization
+def orjson_default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+class FastJSONResponse(JSONResponse):
+    """orjson-rendered JSON response; Pydantic models are dumped straight to bytes.
+
+    Route handlers that return one directly also skip FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return dumps(content)
+
+# Metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+class MetricCounter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{format_labels(self.labels, key)} {value:g}" for key, value in self.values.items())
+        return lines
+
+class MetricHistogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: [count per bucket..., overflow count, sum]
+        self.values: Dict[tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{format_labels(self.labels + ('le',), key + (le,))} {cumulative:g}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {cumulative:g}")
+        return lines
+
+class MetricCallback:
+    """Gauge or counter read at scrape time from a function returning a number or {label values: number}"""
+
+    def __init__(self, name: str, help: str, kind: str, fn, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+        self.labels = labels
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            value = self.fn()
+        except Exception as e:
+            logging.error(f"Error collecting metric {self.name}: {e}")
+            return lines
+        values = value if isinstance(value, dict) else {(): value}
+        lines.extend(
+            f"{self.name}{format_labels(self.labels, key if isinstance(key, tuple) else (key,))} {float(sample):g}"
+            for key, sample in values.items()
+        )
+        return lines
+
+# Metrics Registry
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Union[MetricCounter, MetricHistogram, MetricCallback]] = {}
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> MetricCounter:
+        return self.metrics.setdefault(name, MetricCounter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> MetricHistogram:
+        return self.metrics.setdefault(name, MetricHistogram(name, help, labels, buckets))
+
+    def gauge_callback(self, name: str, help: str, fn, labels: tuple = ()):
+        self.metrics[name] = MetricCallback(name, help, "gauge", fn, labels)
+
+    def counter_callback(self, name: str, help: str, fn, labels: tuple = ()):
+        self.metrics[name] = MetricCallback(name, help, "counter", fn, labels)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route, until the response body completes",
+    ("method", "route"))
+http_requests_total = metrics.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+ergast_request_duration = metrics.histogram(
+    "ergast_request_duration_seconds", "Upstream Ergast request latency per attempt", ("endpoint",))
+ergast_requests_total = metrics.counter("ergast_requests_total", "Upstream Ergast requests per attempt by status", ("endpoint", "status"))
+llm_request_duration = metrics.histogram("llm_request_duration_seconds", "Pit Wall LLM call latency", ("mode",))
+llm_first_token_duration = metrics.histogram("llm_first_token_seconds", "Time to the first streamed Pit Wall chunk")
+llm_tokens_total = metrics.counter(
+    "llm_tokens_total", "Estimated Pit Wall LLM tokens (characters / CHARS_PER_TOKEN)", ("direction",))
+llm_errors_total = metrics.counter("llm_errors_total", "Pit Wall LLM calls that failed", ("mode",))
+mongo_operation_duration = metrics.histogram(
+    "mongo_operation_duration_seconds", "MongoDB operation latency", ("operation",))
+
+def timed(histogram: MetricHistogram, **labels):
+    """Decorator recording an async function's duration in a histogram, whether it returns or raises"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+        return wrapper
+    return decorator
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled by route template to keep cardinality bounded"""
+
+    def __init__(self, app):
+        self.app = app
+        self.route_paths: Optional[Dict] = None
+
+    def route_for(self, scope) -> str:
+        if self.route_paths is None:
+            self.route_paths = {
+                route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        return self.route_paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = self.route_for(scope)
+            http_request_duration.observe(time.perf_counter() - started, method=scope["method"], route=route)
+            http_requests_total.inc(method=scope["method"], route=route, status=status)
+
+# Rate limiting configuration ("requests/seconds" per client; empty or 0 disables a rule).
+# Off by default: behind an ingress every request arrives from the ingress address, so enabling it
+# there also needs RATE_LIMIT_TRUSTED_PROXIES (comma-separated IPs or CIDRs of the ingress hops) or
+# uvicorn's --forwarded-allow-ips; otherwise all users share the ingress's buckets.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+RATE_LIMIT_TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",") if proxy.strip()
+]
+RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "300/60")
+RATE_LIMIT_PIT_WALL = os.getenv("RATE_LIMIT_PIT_WALL", "20/60")
+RATE_LIMIT_INGEST = os.getenv("RATE_LIMIT_INGEST", "2/60")
+RATE_LIMIT_WEBSOCKET = os.getenv("RATE_LIMIT_WEBSOCKET", "30/60")
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+# Most specific prefix first
+RATE_LIMIT_RULES = [
+    ("/api/pit-wall/chat", RATE_LIMIT_PIT_WALL),
+    ("/api/store/ingest", RATE_LIMIT_INGEST),
+    ("/api/ws/", RATE_LIMIT_WEBSOCKET),
+    ("/api/", RATE_LIMIT_DEFAULT),
+]
+
+rate_limited_total = metrics.counter("rate_limited_requests_total", "Requests rejected by the rate limiter", ("rule",))
+
+def parse_rate(spec: str) -> Optional[tuple]:
+    """Parse "120/60" into (capacity 120, refill 2 tokens per second)"""
+    if not spec or spec == "0":
+        return None
+    requests, _, seconds = spec.partition("/")
+    return int(requests), int(requests) / float(seconds or 1)
+
+# Rate limiter
+class RateLimiter:
+    """In-memory token buckets per (rule, client), forgetting the least recently seen clients past max_clients"""
+
+    def __init__(self, rules: List[tuple] = RATE_LIMIT_RULES, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rules = [(prefix, parse_rate(spec)) for prefix, spec in rules if parse_rate(spec)]
+        self.max_clients = max_clients
+        # (prefix, client) -> [tokens, last refill]
+        self.buckets: "OrderedDict[tuple, List[float]]" = OrderedDict()
+
+    def rule_for(self, path: str) -> Optional[tuple]:
+        return next(((prefix, rate) for prefix, rate in self.rules if path.startswith(prefix)), None)
+
+    def take(self, key: tuple, capacity: int, refill: float) -> float:
+        """Spend one token; returns 0 when allowed, otherwise seconds until a token is available"""
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [capacity, now]
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / refill
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 (or closing the WebSocket handshake) once a client's bucket is empty"""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None, trusted_proxies: Optional[List] = None):
+        self.app = app
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.trusted_proxies = trusted_proxies if trusted_proxies is not None else RATE_LIMIT_TRUSTED_PROXIES
+
+    def is_trusted_proxy(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_key(self, scope) -> str:
+        """The peer address, or when the peer is a trusted proxy the rightmost X-Forwarded-For hop
+        that is not; hops further left are client controlled and never used"""
+        client = scope.get("client")
+        address = client[0] if client else "unknown"
+        if not self.is_trusted_proxy(address):
+            return address
+        hops = [
+            hop.strip()
+            for name, value in scope.get("headers", ()) if name == b"x-forwarded-for"
+            for hop in value.decode("latin-1").split(",") if hop.strip()
+        ]
+        for hop in reversed(hops):
+            if not self.is_trusted_proxy(hop):
+                return hop
+        return address
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        rule = self.limiter.rule_for(scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+        prefix, (capacity, refill) = rule
+        retry_after = self.limiter.take((prefix, self.client_key(scope)), capacity, refill)
+        if not retry_after:
+            return await self.app(scope, receive, send)
+        rate_limited_total.inc(rule=prefix)
+        if scope["type"] == "websocket":
+            return await WebSocketClose(code=1008, reason="Rate limit exceeded")(scope, receive, send)
+        response = FastJSONResponse(
+            {"detail": "Rate limit exceeded"}, status_code=429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+        await response(scope, receive, send)
+
+# Response compression configuration
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+LIVE_WS_DEFLATE = os.getenv("LIVE_WS_DEFLATE", "true").lower() == "true"
+
+def add_compression(application: FastAPI):
+    """Brotli for clients that accept it (falling back to gzip) when brotli-asgi is installed, else gzip"""
+    if BrotliMiddleware is not None:
+        application.add_middleware(BrotliMiddleware, quality=BROTLI_QUALITY, minimum_size=COMPRESSION_MIN_SIZE)
+    else:
+        application.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
 # Create the main app
-app = FastAPI(title="HypeRacing F1 Analytics API")
+app = FastAPI(title="HypeRacing F1 Analytics API", default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -65,157 +418,2552 @@ class PitWallRequest(BaseModel):
     session_id: str
     context: Optional[str] = None
 
+# Live timing broadcast configuration
+LIVE_INTERVAL = float(os.getenv("LIVE_INTERVAL", "2"))
+LIVE_CLIENT_QUEUE_SIZE = int(os.getenv("LIVE_CLIENT_QUEUE_SIZE", "8"))
+LIVE_KEYFRAME_INTERVAL = float(os.getenv("LIVE_KEYFRAME_INTERVAL", "10"))
+LIVE_SOURCE = os.getenv("LIVE_SOURCE", "simulated")
+LIVE_REPLAY_FILE = os.getenv("LIVE_REPLAY_FILE", "")
+LIVE_REPLAY_SPEED = float(os.getenv("LIVE_REPLAY_SPEED", "1"))
+LIVE_REPLAY_LOOP = os.getenv("LIVE_REPLAY_LOOP", "true").lower() == "true"
+
+# Live timing sources
+class LiveTimingSource(ABC):
+    """Produces timing snapshots ({race_status, session_time, positions, ...}) for the broadcaster"""
+
+    @abstractmethod
+    def stream(self) -> AsyncIterator[Dict]:
+        ...
+
+class SimulatedTimingSource(LiveTimingSource):
+    def __init__(self, interval: float = LIVE_INTERVAL):
+        self.interval = interval
+
+    async def stream(self) -> AsyncIterator[Dict]:
+        while True:
+            # Simulate live timing data - replace with actual SignalR connection
+            yield {
+                "race_status": "Race",
+                "session_time": "1:23:45",
+                "positions": [
+                    {"pos": 1, "driver": "VER", "gap": "+0.000"},
+                    {"pos": 2, "driver": "LEC", "gap": "+0.234"},
+                    {"pos": 3, "driver": "RUS", "gap": "+1.567"}
+                ]
+            }
+            await asyncio.sleep(self.interval)
+
+class ReplayTimingSource(LiveTimingSource):
+    """Replays a recorded session from JSONL lines of {"t": seconds, "data": snapshot}
+
+    speed scales the recorded gaps between lines (10 = ten times faster);
+    speed <= 0 replays as fast as the broadcast path can take it.
+    """
+
+    def __init__(self, path: str, speed: float = LIVE_REPLAY_SPEED, loop: bool = LIVE_REPLAY_LOOP):
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+
+    def load(self) -> List[Dict]:
+        records = []
+        with self.path.open() as f:
+            for line in f:
+                if line.strip():
+                    records.append(orjson.loads(line))
+        return records
+
+    async def stream(self) -> AsyncIterator[Dict]:
+        records = await asyncio.to_thread(self.load)
+        while True:
+            previous_t = None
+            for record in records:
+                t = float(record.get("t", 0))
+                if self.speed > 0 and previous_t is not None:
+                    await asyncio.sleep(max(t - previous_t, 0) / self.speed)
+                else:
+                    await asyncio.sleep(0)
+                previous_t = t
+                yield record["data"]
+            if not self.loop or not records:
+                return
+
+def create_live_source() -> LiveTimingSource:
+    if LIVE_SOURCE == "replay":
+        return ReplayTimingSource(LIVE_REPLAY_FILE)
+    return SimulatedTimingSource()
+
+# Live timing frames
+class LiveFrame:
+    """One timing tick, encoded at most once per (delta, binary) combination"""
+
+    def __init__(self, snapshot: Dict, delta: Optional[Dict] = None):
+        self.snapshot = snapshot
+        self.delta = delta
+        self.encoded: Dict[tuple, Union[str, bytes]] = {}
+
+    def encode(self, delta: bool = False, binary: bool = False) -> Union[str, bytes]:
+        key = (delta and self.delta is not None, binary)
+        if key not in self.encoded:
+            payload = self.delta if key[0] else self.snapshot
+            self.encoded[key] = msgpack.packb(payload) if binary else dumps(payload).decode()
+        return self.encoded[key]
+
+def diff_timing(previous: Dict, current: Dict) -> Dict:
+    """Changed top-level fields and position rows between two timing snapshots"""
+    changes = {
+        key: value for key, value in current.items()
+        if key != "positions" and previous.get(key) != value
+    }
+    previous_rows = {row["driver"]: row for row in previous.get("positions", [])}
+    current_rows = {row["driver"]: row for row in current.get("positions", [])}
+    return {
+        "changes": changes,
+        "positions": [row for driver, row in current_rows.items() if previous_rows.get(driver) != row],
+        "removed": [driver for driver in previous_rows if driver not in current_rows],
+    }
+
+class LiveSubscriber:
+    __slots__ = ("websocket", "queue", "delta", "binary", "needs_keyframe")
+
+    def __init__(self, websocket: WebSocket, queue_size: int, delta: bool, binary: bool):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.delta = delta
+        self.binary = binary
+        self.needs_keyframe = True
+
 # WebSocket Connection Manager
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, queue_size: int = LIVE_CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.active_connections: Dict[WebSocket, LiveSubscriber] = {}
+        self.dropped_frames = 0
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, delta: bool = False, binary: bool = False) -> LiveSubscriber:
+        """Accept a socket and give it its own bounded outbound frame queue"""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        subscriber = LiveSubscriber(websocket, self.queue_size, delta, binary)
+        self.active_connections[websocket] = subscriber
+        return subscriber
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        self.active_connections.pop(websocket, None)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    async def send_personal_message(self, message: Union[str, bytes], websocket: WebSocket):
+        if isinstance(message, bytes):
+            await websocket.send_bytes(message)
+        else:
+            await websocket.send_text(message)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+    def broadcast(self, frame: LiveFrame, keyframe: bool = False):
+        """Enqueue a frame for every subscriber without waiting on any socket"""
+        for subscriber in self.active_connections.values():
+            self.offer(subscriber, frame, keyframe)
+
+    def offer(self, subscriber: LiveSubscriber, frame: LiveFrame, keyframe: bool = False):
+        queue = subscriber.queue
+        if queue.full():
+            self.dropped_frames += 1
+            if subscriber.delta:
+                # Deltas only apply in sequence, so a gap means starting over from a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                subscriber.needs_keyframe = True
+            else:
+                # A slow consumer loses its oldest pending frame rather than stalling the others
+                queue.get_nowait()
+        send_delta = subscriber.delta and not keyframe and not subscriber.needs_keyframe
+        queue.put_nowait(frame.encode(send_delta, subscriber.binary))
+        subscriber.needs_keyframe = False
 
 manager = ConnectionManager()
 
+# Shared backplane configuration
+BACKPLANE = os.getenv("BACKPLANE", "")
+BACKPLANE_URL = os.getenv("BACKPLANE_URL", "redis://localhost:6379/0")
+BACKPLANE_PREFIX = os.getenv("BACKPLANE_PREFIX", "hyperacing")
+BACKPLANE_LEASE_TTL = float(os.getenv("BACKPLANE_LEASE_TTL", "10"))
+LIVE_CHANNEL = "live"
+
+RENEW_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("pexpire", KEYS[1], ARGV[2]) end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("del", KEYS[1]) end
+return 0
+"""
+
+# Shared backplanes
+class LocalBackplane:
+    """In-process stand-in for RedisBackplane; apps sharing one instance behave like workers sharing Redis"""
+
+    def __init__(self, queue_size: int = LIVE_CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.values: Dict[str, tuple] = {}
+        self.subscribers: Dict[str, set] = {}
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _current(self, key: str):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._current(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self.values[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    async def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        key = f"lease:{name}"
+        if self._current(key) not in (None, holder):
+            return False
+        await self.set(key, holder, ttl)
+        return True
+
+    async def release_lease(self, name: str, holder: str):
+        if self._current(f"lease:{name}") == holder:
+            del self.values[f"lease:{name}"]
+
+    async def publish(self, channel: str, message: bytes):
+        for queue in self.subscribers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.subscribers[channel].discard(queue)
+
+class RedisBackplane:
+    """Redis keys, leases and pub/sub shared by every worker and node"""
+
+    def __init__(self, url: str = BACKPLANE_URL, prefix: str = BACKPLANE_PREFIX):
+        if aioredis is None:
+            raise RuntimeError("BACKPLANE=redis needs the redis package (pip install redis)")
+        self.url = url
+        self.prefix = prefix
+        self.client = None
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    async def start(self):
+        if self.client is None:
+            self.client = aioredis.from_url(self.url)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.key(key))
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        await self.client.set(self.key(key), value, px=int(ttl * 1000) if ttl else None)
+
+    async def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        key = self.key(f"lease:{name}")
+        if await self.client.set(key, holder, nx=True, px=int(ttl * 1000)):
+            return True
+        # Only the current holder may extend its lease
+        return bool(await self.client.eval(RENEW_LEASE_SCRIPT, 1, key, holder, int(ttl * 1000)))
+
+    async def release_lease(self, name: str, holder: str):
+        await self.client.eval(RELEASE_LEASE_SCRIPT, 1, self.key(f"lease:{name}"), holder)
+
+    async def publish(self, channel: str, message: bytes):
+        await self.client.publish(self.key(channel), message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.key(channel))
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+def create_backplane():
+    if BACKPLANE == "redis":
+        return RedisBackplane()
+    if BACKPLANE == "local":
+        return LocalBackplane()
+    return None
+
+# Leader election
+class LeaderElection:
+    """Holds a renewable lease on the backplane so exactly one worker runs the singleton jobs
+    (live timing production, prefetching); without a backplane this process always leads"""
+
+    def __init__(self, backplane, name: str = "leader", ttl: float = BACKPLANE_LEASE_TTL):
+        self.backplane = backplane
+        self.name = name
+        self.ttl = ttl
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = backplane is None
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.backplane is None or (self.task is not None and not self.task.done()):
+            return
+        await self.campaign()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.backplane is not None and self.is_leader:
+            try:
+                await self.backplane.release_lease(self.name, self.worker_id)
+            except Exception as e:
+                logging.error(f"Error releasing {self.name} lease: {e}")
+            self.is_leader = False
+
+    async def campaign(self):
+        try:
+            leading = await self.backplane.acquire_lease(self.name, self.worker_id, self.ttl)
+        except Exception as e:
+            logging.error(f"Error renewing {self.name} lease: {e}")
+            leading = False
+        if leading != self.is_leader:
+            logging.info(f"Worker {self.worker_id} {'acquired' if leading else 'lost'} the {self.name} lease")
+        self.is_leader = leading
+
+    async def _run(self):
+        while True:
+            # Renew well inside the TTL so a healthy leader never lapses
+            await asyncio.sleep(self.ttl / 3)
+            await self.campaign()
+
+backplane = create_backplane()
+leader = LeaderElection(backplane)
+
+# Live timing producer
+class LiveTimingBroadcaster:
+    """Single producer that builds and serializes each timing frame once for all subscribers.
+
+    With a backplane only the leader reads the source; it publishes each snapshot once and every
+    worker relays it to its own subscribers.
+    """
+
+    def __init__(self, connections: ConnectionManager, source: LiveTimingSource, interval: float = LIVE_INTERVAL,
+                 keyframe_interval: float = LIVE_KEYFRAME_INTERVAL, backplane=None,
+                 leader: Optional[LeaderElection] = None):
+        self.connections = connections
+        self.source = source
+        self.interval = interval
+        self.keyframe_interval = keyframe_interval
+        self.backplane = backplane
+        self.leader = leader
+        self.task: Optional[asyncio.Task] = None
+        self.latest_frame: Optional[LiveFrame] = None
+        self.last_keyframe_at = 0.0
+        self.frames_produced = 0
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def publish(self, data: Dict):
+        """Turn a timing snapshot into a keyframe plus a delta against the previous tick"""
+        self.frames_produced += 1
+        timestamp = datetime.utcnow().isoformat()
+        snapshot = {"timestamp": timestamp, "type": "timing_update", "seq": self.frames_produced, "data": data}
+        delta = None
+        if self.latest_frame is not None:
+            delta = {
+                "timestamp": timestamp,
+                "type": "timing_delta",
+                "seq": self.frames_produced,
+                "base": self.latest_frame.snapshot["seq"],
+                **diff_timing(self.latest_frame.snapshot["data"], data),
+            }
+        now = time.monotonic()
+        keyframe = delta is None or now - self.last_keyframe_at >= self.keyframe_interval
+        if keyframe:
+            self.last_keyframe_at = now
+        self.latest_frame = LiveFrame(snapshot, delta)
+        self.connections.broadcast(self.latest_frame, keyframe)
+
+    def leading(self) -> bool:
+        return self.leader is None or self.leader.is_leader
+
+    async def _produce(self) -> bool:
+        """Read the source until it finishes (True) or this worker stops leading (False)"""
+        async for data in self.source.stream():
+            if not self.leading():
+                return False
+            if self.backplane is not None:
+                await self.backplane.publish(LIVE_CHANNEL, orjson.dumps(data))
+            elif self.connections.active_connections:
+                self.publish(data)
+        return True
+
+    async def _relay(self):
+        while True:
+            try:
+                async for message in self.backplane.subscribe(LIVE_CHANNEL):
+                    if self.connections.active_connections:
+                        self.publish(orjson.loads(message))
+            except Exception as e:
+                logging.error(f"Error relaying live timing frames: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _run(self):
+        relay = asyncio.create_task(self._relay()) if self.backplane is not None else None
+        try:
+            while True:
+                if self.leading():
+                    try:
+                        if await self._produce():
+                            logging.info("Live timing source finished")
+                            if relay is not None:
+                                await relay
+                            return
+                    except Exception as e:
+                        logging.error(f"Error producing live timing frame: {e}")
+                await asyncio.sleep(self.interval)
+        finally:
+            if relay is not None:
+                relay.cancel()
+
+live_broadcaster = LiveTimingBroadcaster(manager, create_live_source(), backplane=backplane, leader=leader)
+
+# Upstream HTTP client configuration
+ERGAST_BASE_URL = os.getenv("ERGAST_BASE_URL", "https://api.jolpi.ca/ergast/f1")
+ERGAST_MAX_CONNECTIONS = int(os.getenv("ERGAST_MAX_CONNECTIONS", "50"))
+ERGAST_MAX_KEEPALIVE = int(os.getenv("ERGAST_MAX_KEEPALIVE", "20"))
+ERGAST_KEEPALIVE_EXPIRY = float(os.getenv("ERGAST_KEEPALIVE_EXPIRY", "30"))
+ERGAST_TIMEOUT = float(os.getenv("ERGAST_TIMEOUT", "10"))
+ERGAST_CONNECT_TIMEOUT = float(os.getenv("ERGAST_CONNECT_TIMEOUT", "3"))
+ERGAST_RETRIES = int(os.getenv("ERGAST_RETRIES", "2"))
+ERGAST_RETRY_BACKOFF = float(os.getenv("ERGAST_RETRY_BACKOFF", "0.25"))
+ERGAST_HTTP2 = os.getenv("ERGAST_HTTP2", "true").lower() == "true"
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+ERGAST_PAGE_SIZE = 100
+CURRENT_STANDINGS_PATH = "/current/driverStandings.json"
+
+# Bulk driver details fan-out
+DRIVER_DETAILS_CONCURRENCY = int(os.getenv("DRIVER_DETAILS_CONCURRENCY", "8"))
+DRIVER_DETAILS_MAX_IDS = int(os.getenv("DRIVER_DETAILS_MAX_IDS", "30"))
+
+# Upstream response cache configuration
+ERGAST_CACHE_MAX_ENTRIES = int(os.getenv("ERGAST_CACHE_MAX_ENTRIES", "512"))
+ERGAST_CACHE_TTL = float(os.getenv("ERGAST_CACHE_TTL", "300"))
+ERGAST_CACHE_STALE_TTL = float(os.getenv("ERGAST_CACHE_STALE_TTL", "86400"))
+ERGAST_CACHE_MONGO = os.getenv("ERGAST_CACHE_MONGO", "false").lower() == "true"
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value, stored_at: Optional[float] = None):
+        self.value = value
+        self.stored_at = stored_at if stored_at is not None else time.time()
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+# Response Cache
+class ResponseCache:
+    """In-process LRU cache with TTL, stale window and an optional second tier shared between workers
+    (the backplane when configured, otherwise MongoDB)"""
+
+    def __init__(self, max_entries: int = ERGAST_CACHE_MAX_ENTRIES, ttl: float = ERGAST_CACHE_TTL,
+                 stale_ttl: float = ERGAST_CACHE_STALE_TTL, collection=None, backplane=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.collection = collection
+        self.backplane = backplane
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.l2_hits = 0
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.age < self.ttl
+
+    async def ensure_indexes(self):
+        """Expire second-tier entries once they are too old to serve even as stale"""
+        if self.collection is None:
+            return
+        try:
+            await self.collection.create_index("stored_at", expireAfterSeconds=int(self.stale_ttl))
+        except Exception as e:
+            logging.error(f"Error creating cache indexes: {e}")
+
+    @property
+    def shared(self) -> bool:
+        return self.backplane is not None or self.collection is not None
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Look up a cached upstream payload, returning fresh or stale entries"""
+        entry = self.entries.get(key)
+        if entry is not None and entry.age >= self.stale_ttl:
+            # Too old to serve normally, but kept as the last known good copy for outages
+            entry = None
+        if self.shared and (entry is None or not self.is_fresh(entry)):
+            # Another worker may already have fetched or refreshed this path
+            shared = await self._get_l2(key)
+            if shared is not None and (entry is None or shared.stored_at > entry.stored_at):
+                self.l2_hits += 1
+                self._set_l1(key, shared)
+                entry = shared
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        if self.is_fresh(entry):
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def last_known_good(self, key: str) -> Optional[CacheEntry]:
+        """The newest in-process copy of a payload, however old"""
+        return self.entries.get(key)
+
+    async def set(self, key: str, value):
+        """Store an upstream payload in every cache tier"""
+        entry = CacheEntry(value)
+        self._set_l1(key, entry)
+        if self.shared:
+            await self._set_l2(key, entry)
+
+    def _set_l1(self, key: str, entry: CacheEntry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def _set_l2(self, key: str, entry: CacheEntry):
+        try:
+            if self.backplane is not None:
+                document = orjson.dumps({"value": entry.value, "stored_at": entry.stored_at})
+                await self.backplane.set(f"ergast:{key}", document, self.stale_ttl)
+            else:
+                await self._set_mongo(key, entry)
+        except Exception as e:
+            logging.error(f"Error writing cache entry {key} to the shared tier: {e}")
+
+    async def _get_l2(self, key: str) -> Optional[CacheEntry]:
+        try:
+            if self.backplane is not None:
+                document = await self.backplane.get(f"ergast:{key}")
+                document = orjson.loads(document) if document else None
+                entry = CacheEntry(document["value"], document["stored_at"]) if document else None
+            else:
+                entry = await self._get_mongo(key)
+        except Exception as e:
+            logging.error(f"Error reading cache entry {key} from the shared tier: {e}")
+            return None
+        if entry is None or entry.age >= self.stale_ttl:
+            return None
+        return entry
+
+    @timed(mongo_operation_duration, operation="cache_write")
+    async def _set_mongo(self, key: str, entry: CacheEntry):
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "value": entry.value, "stored_at": datetime.utcfromtimestamp(entry.stored_at)},
+            upsert=True,
+        )
+
+    @timed(mongo_operation_duration, operation="cache_read")
+    async def _get_mongo(self, key: str) -> Optional[CacheEntry]:
+        doc = await self.collection.find_one({"_id": key})
+        if not doc:
+            return None
+        return CacheEntry(doc["value"], doc["stored_at"].replace(tzinfo=timezone.utc).timestamp())
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "l2_hits": self.l2_hits,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "mongo_tier": self.collection is not None,
+            "backplane_tier": self.backplane is not None,
+        }
+
+# Circuit breaker configuration
+ERGAST_BREAKER_FAILURES = int(os.getenv("ERGAST_BREAKER_FAILURES", "5"))
+ERGAST_BREAKER_RESET = float(os.getenv("ERGAST_BREAKER_RESET", "30"))
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the upstream while the circuit is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit open, retrying in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class UpstreamUnavailable(Exception):
+    """The upstream failed and there is no last known good copy to fall back on"""
+
+    def __init__(self, path: str, retry_after: float = ERGAST_BREAKER_RESET):
+        super().__init__(f"Upstream unavailable for {path}")
+        self.retry_after = max(int(retry_after), 1)
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Errors that mean the upstream is unhealthy, as opposed to a bad request"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (CircuitOpen, httpx.TransportError))
+
+# Circuit Breaker
+class CircuitBreaker:
+    """Opens after consecutive upstream failures so callers fail fast instead of queueing on a dead
+    upstream, then lets a single half-open probe through each reset period to test recovery"""
+
+    def __init__(self, failure_threshold: int = ERGAST_BREAKER_FAILURES, reset_timeout: float = ERGAST_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.opened = 0
+        self.rejected = 0
+
+    def check(self):
+        """Raise CircuitOpen unless a request may go upstream now"""
+        if self.state == "closed":
+            return
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpen(max(remaining, 1.0))
+
+    def record_success(self):
+        if self.state != "closed":
+            logging.info("Upstream recovered, closing circuit")
+        self.state = "closed"
+        self.failures = 0
+        self.probing = False
+
+    def abandon_probe(self):
+        """A cancelled probe neither proves nor disproves recovery"""
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+                logging.warning(f"Opening upstream circuit after {self.failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+# Age of the oldest stale upstream payload used for the current request; a mutable holder so that
+# values noted inside gathered child tasks (which copy the context) still reach the request
+data_staleness: ContextVar[Optional[Dict]] = ContextVar("data_staleness", default=None)
+
+def note_stale(age: float):
+    holder = data_staleness.get()
+    if holder is not None:
+        holder["age"] = max(holder["age"] or 0.0, age)
+
+class StalenessMiddleware:
+    """ASGI middleware adding X-Data-Stale / X-Data-Age when a response was built from stale upstream data"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        holder = {"age": None}
+        token = data_staleness.set(holder)
+
+        async def send_with_staleness(message):
+            if message["type"] == "http.response.start" and holder["age"] is not None:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-data-stale", b"true"),
+                    (b"x-data-age", str(int(holder["age"])).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_staleness)
+        finally:
+            data_staleness.reset(token)
+
+# Ergast payload helpers
+def standing_to_driver(standing: Dict) -> Dict:
+    """Flatten an Ergast DriverStanding into the API's driver shape"""
+    driver_data = standing['Driver']
+    constructor = standing['Constructors'][0]
+    return {
+        "driver_id": driver_data['driverId'],
+        "name": f"{driver_data['givenName']} {driver_data['familyName']}",
+        "team": constructor['name'],
+        "nationality": driver_data['nationality'],
+        "number": driver_data.get('permanentNumber', 'N/A'),
+        "position": int(standing['position']),
+        "points": float(standing['points'])
+    }
+
+def race_to_summary(race: Dict) -> Dict:
+    """Flatten an Ergast Race into the API's race shape"""
+    return {
+        "season": race['season'],
+        "round": race['round'],
+        "race_name": race['raceName'],
+        "circuit_name": race['Circuit']['circuitName'],
+        "date": race['date'],
+        "time": race.get('time'),
+        "results": race.get('Results', [])
+    }
+
+# Race list pagination and projection
+RACES_DEFAULT_LIMIT = 10
+RACES_MAX_LIMIT = int(os.getenv("RACES_MAX_LIMIT", "50"))
+RACE_FIELDS = ("season", "round", "race_name", "circuit_name", "date", "time", "results")
+COMPACT_RESULT_FIELDS = (
+    "position", "points", "grid", "laps", "status", "Time.time",
+    "Driver.driverId", "Driver.code", "Driver.givenName", "Driver.familyName", "Constructor.name",
+)
+
+def compact_result(result: Dict) -> Dict:
+    """Reduce a nested Ergast Result to the handful of fields list views render"""
+    driver = result.get('Driver', {})
+    position = result.get('position')
+    points = result.get('points')
+    return {
+        "position": int(position) if position else None,
+        "driver_id": driver.get('driverId'),
+        "code": driver.get('code'),
+        "driver": f"{driver.get('givenName', '')} {driver.get('familyName', '')}".strip(),
+        "team": result.get('Constructor', {}).get('name'),
+        "grid": result.get('grid'),
+        "laps": result.get('laps'),
+        "points": float(points) if points else 0.0,
+        "status": result.get('status'),
+        "time": result.get('Time', {}).get('time')
+    }
+
+def shape_race(race: Dict, fields: Optional[List[str]] = None, compact: bool = False, top: Optional[int] = None) -> Dict:
+    """Apply field projection, result truncation and the compact result shape to a race summary"""
+    if fields:
+        race = {key: race[key] for key in ("season", "round", *fields) if key in race}
+    if "results" in race:
+        results = race["results"] or []
+        if top is not None:
+            results = results[:top]
+        race["results"] = [compact_result(result) for result in results] if compact else results
+    return race
+
+def encode_race_cursor(race: Dict) -> str:
+    return f"{race['season']}:{race['round']}"
+
+def decode_race_cursor(cursor: str) -> tuple:
+    season, round_ = cursor.split(":")
+    return int(season), int(round_)
+
+def ergast_endpoint(path: str) -> str:
+    """Upstream path as a metrics label, with the query string and driver ids templated out"""
+    return re.sub(r"/drivers/[^/]+?(?=/|\.json)", "/drivers/{id}", path.split("?", 1)[0])
+
+# Standings change detection
+class DataVersion:
+    """Fingerprint of the latest standings table, changing whenever its content does"""
+
+    def __init__(self):
+        self.value = ""
+        self.updated_at: Optional[datetime] = None
+        self.listeners: List = []
+
+    def observe(self, standings_list: Dict) -> bool:
+        digest = hashlib.sha1(orjson.dumps(standings_list, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+        if not self.adopt(digest):
+            return False
+        for listener in self.listeners:
+            listener()
+        return True
+
+    def adopt(self, digest: str) -> bool:
+        """Take a version computed elsewhere (another worker) without notifying listeners"""
+        if digest == self.value:
+            return False
+        self.value = digest
+        self.updated_at = datetime.utcnow()
+        return True
+
+# Request coalescing
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one shared in-flight task"""
+
+    def __init__(self):
+        self.calls: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn, *args):
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn(*args))
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled caller does not abort the fetch for everyone else
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            task.exception()
+
 # F1 Data Service
 class F1DataService:
-    def __init__(self):
-        self.base_url = "http://api.jolpi.ca/ergast/f1"
-        
-    async def get_current_standings(self):
-        """Get current driver standings"""
-        async with httpx.AsyncClient(follow_redirects=True) as client:
+    def __init__(self, base_url: str = ERGAST_BASE_URL, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 cache: Optional[ResponseCache] = None, breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url
+        self.transport = transport
+        self.cache = cache if cache is not None else ResponseCache()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.inflight = SingleFlight()
+        self.standings_version = DataVersion()
+        self.refresh_tasks: Dict[str, asyncio.Task] = {}
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.request_counts: Counter = Counter()
+
+    async def start(self):
+        """Open the shared connection-pooled upstream client"""
+        if self.client is not None:
+            return
+        # HTTP/2 needs the optional h2 package (httpx[http2])
+        http2 = ERGAST_HTTP2 and self.transport is None and importlib.util.find_spec("h2") is not None
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            follow_redirects=True,
+            http2=http2,
+            transport=self.transport,
+            limits=httpx.Limits(
+                max_connections=ERGAST_MAX_CONNECTIONS,
+                max_keepalive_connections=ERGAST_MAX_KEEPALIVE,
+                keepalive_expiry=ERGAST_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(ERGAST_TIMEOUT, connect=ERGAST_CONNECT_TIMEOUT),
+        )
+
+    async def close(self):
+        """Close the shared upstream client"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _get_json(self, path: str, timeout: Optional[float] = None):
+        """Serve an upstream path from cache, revalidating stale entries in the background and
+        falling back to the last known good copy while the upstream is failing"""
+        self.request_counts[path] += 1
+        entry = await self.cache.get(path)
+        if entry is None:
             try:
-                response = await client.get(f"{self.base_url}/current/driverStandings.json")
-                data = response.json()
-                standings = data['MRData']['StandingsTable']['StandingsLists'][0]['DriverStandings']
-                
-                drivers = []
-                for standing in standings:
-                    driver_data = standing['Driver']
-                    constructor = standing['Constructors'][0]
-                    
-                    driver = {
-                        "driver_id": driver_data['driverId'],
-                        "name": f"{driver_data['givenName']} {driver_data['familyName']}",
-                        "team": constructor['name'],
-                        "nationality": driver_data['nationality'],
-                        "number": driver_data.get('permanentNumber', 'N/A'),
-                        "position": int(standing['position']),
-                        "points": float(standing['points'])
-                    }
-                    drivers.append(driver)
-                
-                return drivers
+                return await self._refresh(path, timeout)
             except Exception as e:
-                logging.error(f"Error fetching driver standings: {e}")
-                return []
-    
-    async def get_recent_races(self, limit=10):
-        """Get recent race results"""
-        async with httpx.AsyncClient(follow_redirects=True) as client:
+                fallback = self.cache.last_known_good(path)
+                if not is_upstream_failure(e):
+                    raise
+                if fallback is None:
+                    raise UpstreamUnavailable(path, getattr(e, "retry_after", ERGAST_BREAKER_RESET)) from e
+                logging.warning(f"Serving last known good {path} ({fallback.age:.0f}s old): {e}")
+                entry = fallback
+        if not self.cache.is_fresh(entry):
+            note_stale(entry.age)
+            if path not in self.refresh_tasks:
+                task = asyncio.create_task(self._background_refresh(path))
+                self.refresh_tasks[path] = task
+                task.add_done_callback(lambda _: self.refresh_tasks.pop(path, None))
+        return entry.value
+
+    async def _refresh(self, path: str, timeout: Optional[float] = None):
+        """Fetch an upstream path once for all concurrent callers and store it in the cache"""
+        return await self.inflight.do(path, self._fetch_and_store, path, timeout)
+
+    async def _fetch_and_store(self, path: str, timeout: Optional[float] = None):
+        data = await self._fetch_json(path, timeout)
+        await self.cache.set(path, data)
+        if path == CURRENT_STANDINGS_PATH:
+            standings_lists = data['MRData']['StandingsTable']['StandingsLists']
+            if standings_lists:
+                self.standings_version.observe(standings_lists[0])
+        return data
+
+    async def _background_refresh(self, path: str):
+        self.refreshes += 1
+        try:
+            await self._refresh(path)
+        except CircuitOpen:
+            # Expected while the upstream is down; the breaker already logged the outage
+            self.refresh_errors += 1
+        except Exception as e:
+            self.refresh_errors += 1
+            logging.error(f"Error revalidating cached {path}: {e}")
+
+    def hot_paths(self, limit: int) -> List[str]:
+        """Most requested upstream paths since counts were last decayed"""
+        return [path for path, _ in self.request_counts.most_common(limit)]
+
+    def decay_request_counts(self):
+        """Halve request counts so popularity follows recent traffic"""
+        for path, count in list(self.request_counts.items()):
+            if count > 1:
+                self.request_counts[path] = count // 2
+            else:
+                del self.request_counts[path]
+
+    def cache_stats(self) -> Dict:
+        return {
+            **self.cache.stats(),
+            "background_refreshes": self.refreshes,
+            "background_refresh_errors": self.refresh_errors,
+            "inflight_requests": len(self.inflight.calls),
+            "coalesced_requests": self.inflight.coalesced,
+            "circuit": self.breaker.stats(),
+        }
+
+    async def _fetch_json(self, path: str, timeout: Optional[float] = None):
+        """GET an upstream path through the circuit breaker, failing fast with CircuitOpen while it is open"""
+        self.breaker.check()
+        try:
+            data = await self._fetch_with_retries(path, timeout)
+        except asyncio.CancelledError:
+            self.breaker.abandon_probe()
+            raise
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.breaker.record_failure()
+            else:
+                # The upstream answered; the request itself was bad
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return data
+
+    async def _fetch_with_retries(self, path: str, timeout: Optional[float] = None):
+        """GET an upstream path with retry and exponential backoff"""
+        if self.client is None:
+            await self.start()
+        request_timeout = httpx.Timeout(timeout, connect=ERGAST_CONNECT_TIMEOUT) if timeout else httpx.USE_CLIENT_DEFAULT
+        for attempt in range(ERGAST_RETRIES + 1):
+            endpoint = ergast_endpoint(path)
+            started = time.perf_counter()
             try:
-                response = await client.get(f"{self.base_url}/current/results.json?limit={limit}")
-                data = response.json()
-                races = data['MRData']['RaceTable']['Races']
-                
-                race_results = []
-                for race in races:
-                    race_info = {
-                        "season": race['season'],
-                        "round": race['round'],
-                        "race_name": race['raceName'],
-                        "circuit_name": race['Circuit']['circuitName'],
-                        "date": race['date'],
-                        "time": race.get('time'),
-                        "results": race.get('Results', [])
-                    }
-                    race_results.append(race_info)
+                response = await self.client.get(path, timeout=request_timeout)
+                ergast_request_duration.observe(time.perf_counter() - started, endpoint=endpoint)
+                ergast_requests_total.inc(endpoint=endpoint, status=response.status_code)
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in RETRYABLE_STATUS_CODES or attempt >= ERGAST_RETRIES:
+                    raise
+                error = e
+            except httpx.TransportError as e:
+                ergast_request_duration.observe(time.perf_counter() - started, endpoint=endpoint)
+                ergast_requests_total.inc(endpoint=endpoint, status=type(e).__name__)
+                if attempt >= ERGAST_RETRIES:
+                    raise
+                error = e
+            delay = ERGAST_RETRY_BACKOFF * (2 ** attempt)
+            logging.warning(f"Retrying {path} in {delay:.2f}s after upstream error: {error}")
+            await asyncio.sleep(delay)
+
+    async def _fetch_all_pages(self, path: str, table: str, items: str, cached: bool = False) -> List[Dict]:
+        """Walk every page of a paginated Ergast table, through the response cache if cached"""
+        fetch = self._get_json if cached else self._fetch_json
+        collected: List[Dict] = []
+        offset = 0
+        while True:
+            separator = "&" if "?" in path else "?"
+            data = await fetch(f"{path}{separator}limit={ERGAST_PAGE_SIZE}&offset={offset}")
+            collected.extend(data['MRData'][table][items])
+            offset += ERGAST_PAGE_SIZE
+            if offset >= int(data['MRData'].get('total', 0)):
+                return collected
+
+    async def fetch_season_standings(self, season: str) -> Dict:
+        """Fetch the latest driver standings table for a season, bypassing the cache"""
+        data = await self._fetch_json(f"/{season}/driverStandings.json")
+        standings_lists = data['MRData']['StandingsTable']['StandingsLists']
+        return standings_lists[0] if standings_lists else {}
+
+    async def fetch_season_results(self, season: str, cached: bool = False) -> List[Dict]:
+        """Fetch every race result of a season, merging races split across pages"""
+        races: Dict[str, Dict] = {}
+        for race in await self._fetch_all_pages(f"/{season}/results.json", "RaceTable", "Races", cached):
+            merged = races.setdefault(race['round'], {**race, "Results": []})
+            merged["Results"].extend(race.get("Results", []))
+        return list(races.values())
+
+    async def fetch_season_drivers(self, season: str) -> List[Dict]:
+        """Fetch every driver entered in a season"""
+        return await self._fetch_all_pages(f"/{season}/drivers.json", "DriverTable", "Drivers")
+
+    async def get_current_standings(self):
+        """Get current driver standings"""
+        try:
+            data = await self._get_json(CURRENT_STANDINGS_PATH)
+            standings = data['MRData']['StandingsTable']['StandingsLists'][0]['DriverStandings']
+            
+            drivers = [standing_to_driver(standing) for standing in standings]
+            
+            return drivers
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching driver standings: {e}")
+            return []
+    
+    async def get_recent_races(self, limit=10, before: Optional[tuple] = None):
+        """Get the current season's races newest first, starting after the (season, round) keyset cursor"""
+        try:
+            # Ergast's limit counts result rows, not races, so page through the whole season
+            races = await self.fetch_season_results("current", cached=True)
+            races.sort(key=lambda race: (int(race["season"]), int(race["round"])), reverse=True)
+            if before is not None:
+                races = [race for race in races if (int(race["season"]), int(race["round"])) < before]
+            
+            race_results = [race_to_summary(race) for race in races[:limit]]
+            
+            return race_results
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching race results: {e}")
+            return []
+
+    async def get_last_race(self) -> Optional[Dict]:
+        """Get the most recent race with its full results"""
+        try:
+            data = await self._get_json(f"/current/last/results.json?limit={ERGAST_PAGE_SIZE}")
+            races = data['MRData']['RaceTable']['Races']
+            return race_to_summary(races[0]) if races else None
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching last race: {e}")
+            return None
+
+    async def get_driver_details(self, driver_id: str):
+        """Get detailed driver information"""
+        try:
+            # Get driver info and this season's results concurrently
+            data, results_data = await asyncio.gather(
+                self._get_json(f"/current/drivers/{driver_id}.json"),
+                self._get_json(f"/current/drivers/{driver_id}/results.json"),
+            )
+            
+            if not data['MRData']['DriverTable']['Drivers']:
+                return None
                 
-                return race_results
+            driver_data = data['MRData']['DriverTable']['Drivers'][0]
+            races = results_data['MRData']['RaceTable']['Races']
+            
+            return {
+                "driver_info": driver_data,
+                "season_results": races
+            }
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching driver details: {e}")
+            return None
+
+    async def get_drivers_details(self, driver_ids: List[str], concurrency: int = DRIVER_DETAILS_CONCURRENCY):
+        """Get detailed information for several drivers with bounded concurrency"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(driver_id: str):
+            async with semaphore:
+                return await self.get_driver_details(driver_id)
+
+        details = await asyncio.gather(*(fetch(driver_id) for driver_id in driver_ids))
+        return dict(zip(driver_ids, details))
+
+f1_service = F1DataService(
+    cache=ResponseCache(collection=db.ergast_cache if ERGAST_CACHE_MONGO else None, backplane=backplane)
+)
+
+# Historical data store configuration
+SEASON_PATTERN = r"^(current|\d{4})$"
+F1_STORE_SEASONS = [season.strip() for season in os.getenv("F1_STORE_SEASONS", "").split(",") if season.strip()]
+INGEST_MAX_SEASONS = int(os.getenv("INGEST_MAX_SEASONS", "5"))
+# Without a token the ingest endpoint is disabled and seasons load only from F1_STORE_SEASONS at startup
+INGEST_ADMIN_TOKEN = os.getenv("INGEST_ADMIN_TOKEN", "")
+
+# Historical F1 Data Store
+class F1DataStore:
+    """Ingested seasons of standings and results in MongoDB, served through indexed queries"""
+
+    def __init__(self, database, service: F1DataService):
+        self.races = database.races
+        self.standings = database.driver_standings
+        self.drivers = database.drivers
+        self.service = service
+        self.seasons: List[int] = []
+        # Year of the last "current" ingestion; until then the current routes go to the live service
+        self.current_season: Optional[int] = None
+        self.listeners: List = []
+
+    async def ensure_indexes(self):
+        """Create the compound indexes every read path relies on"""
+        try:
+            await self.races.create_index([("season", -1), ("round", -1)], unique=True)
+            await self.races.create_index([("results.Driver.driverId", 1), ("season", -1)])
+            await self.standings.create_index([("driver_id", 1), ("season", -1)], unique=True)
+            await self.standings.create_index([("season", -1), ("position", 1)])
+            await self.drivers.create_index([("driver_id", 1), ("season", -1)], unique=True)
+            self.seasons = sorted(await self.races.distinct("season"), reverse=True)
+        except Exception as e:
+            logging.error(f"Error preparing F1 data store: {e}")
+
+    async def ingest_season(self, season: str) -> Dict:
+        """Bulk-load one season ("current" or a year) of standings, results and drivers"""
+        standings_list, races, drivers = await asyncio.gather(
+            self.service.fetch_season_standings(season),
+            self.service.fetch_season_results(season),
+            self.service.fetch_season_drivers(season),
+        )
+        if not races and not standings_list:
+            return {"season": season, "races": 0, "standings": 0, "drivers": 0}
+        year = int(standings_list.get('season') or races[0]['season'])
+        standings_round = int(standings_list.get('round', 0))
+        if standings_list and (season == "current" or year == self.current_season):
+            self.service.standings_version.observe(standings_list)
+
+        race_ops = [
+            ReplaceOne(
+                {"season": year, "round": int(race['round'])},
+                {
+                    **race_to_summary(race),
+                    "season": year,
+                    "round": int(race['round']),
+                    "circuit": race['Circuit'],
+                    "url": race.get('url'),
+                },
+                upsert=True,
+            )
+            for race in races
+        ]
+        standing_ops = [
+            ReplaceOne(
+                {"driver_id": standing['Driver']['driverId'], "season": year},
+                {
+                    **standing_to_driver(standing),
+                    "season": year,
+                    "round": standings_round,
+                    "wins": int(standing.get('wins', 0)),
+                },
+                upsert=True,
+            )
+            for standing in standings_list.get('DriverStandings', [])
+        ]
+        driver_ops = [
+            ReplaceOne(
+                {"driver_id": driver['driverId'], "season": year},
+                {"driver_id": driver['driverId'], "season": year, "info": driver},
+                upsert=True,
+            )
+            for driver in drivers
+        ]
+        if race_ops:
+            await self.races.bulk_write(race_ops, ordered=False)
+        if standing_ops:
+            await self.standings.bulk_write(standing_ops, ordered=False)
+        if driver_ops:
+            await self.drivers.bulk_write(driver_ops, ordered=False)
+
+        if year not in self.seasons:
+            self.seasons = sorted(self.seasons + [year], reverse=True)
+        if season == "current":
+            self.current_season = year
+        for listener in self.listeners:
+            listener()
+        logging.info(f"Ingested {year}: {len(race_ops)} races, {len(standing_ops)} standings, {len(driver_ops)} drivers")
+        return {"season": year, "races": len(race_ops), "standings": len(standing_ops), "drivers": len(driver_ops)}
+
+    async def ingest_seasons(self, seasons: List[str]) -> List[Dict]:
+        """Ingest several seasons one after another to stay polite to the upstream"""
+        summaries = []
+        for season in seasons:
+            try:
+                summaries.append(await self.ingest_season(season))
             except Exception as e:
-                logging.error(f"Error fetching race results: {e}")
-                return []
+                logging.error(f"Error ingesting season {season}: {e}")
+                summaries.append({"season": season, "error": str(e)})
+        return summaries
 
+    @timed(mongo_operation_duration, operation="store_current_standings")
+    async def get_current_standings(self):
+        """Get driver standings for the ingested current season"""
+        if self.current_season is None:
+            return await self.service.get_current_standings()
+        cursor = self.standings.find(
+            {"season": self.current_season},
+            {"_id": 0, "driver_id": 1, "name": 1, "team": 1, "nationality": 1, "number": 1, "position": 1, "points": 1},
+        ).sort("position", 1)
+        return await cursor.to_list(length=None)
+
+    @timed(mongo_operation_duration, operation="store_recent_races")
+    async def get_recent_races(self, limit=RACES_DEFAULT_LIMIT, before: Optional[tuple] = None,
+                               fields: Optional[List[str]] = None, compact: bool = False, top: Optional[int] = None):
+        """Get races newest first, starting after the (season, round) keyset cursor"""
+        if self.current_season is None:
+            races = await self.service.get_recent_races(limit, before)
+            return [shape_race(race, fields, compact, top) for race in races]
+
+        query = {}
+        if before is not None:
+            season, round_ = before
+            query = {"$or": [{"season": {"$lt": season}}, {"season": season, "round": {"$lt": round_}}]}
+        projection = {"_id": 0}
+        for field in fields or RACE_FIELDS:
+            projection[field] = 1
+        projection.update({"season": 1, "round": 1})
+        if "results" in projection:
+            if top is not None:
+                projection["results"] = {"$slice": top}
+            elif compact:
+                del projection["results"]
+                projection.update({f"results.{field}": 1 for field in COMPACT_RESULT_FIELDS})
+        cursor = self.races.find(query, projection).sort([("season", -1), ("round", -1)]).limit(limit)
+        races = await cursor.to_list(length=limit)
+        for race in races:
+            race["season"], race["round"] = str(race["season"]), str(race["round"])
+        return [shape_race(race, None, compact) for race in races]
+
+    @timed(mongo_operation_duration, operation="store_latest_race")
+    async def get_latest_race(self, top: Optional[int] = None) -> Optional[Dict]:
+        """Get the last round of the ingested current season in the compact shape"""
+        if self.current_season is None:
+            race = await self.service.get_last_race()
+            return shape_race(race, None, True, top) if race else None
+        race = await self.races.find_one(
+            {"season": self.current_season},
+            {"_id": 0, "season": 1, "round": 1, "race_name": 1, "circuit_name": 1, "date": 1, "time": 1,
+             "results": {"$slice": top} if top is not None else 1},
+            sort=[("round", -1)],
+        )
+        if race is None:
+            return None
+        race["season"], race["round"] = str(race["season"]), str(race["round"])
+        return shape_race(race, None, True)
+
+    @timed(mongo_operation_duration, operation="store_driver_details")
     async def get_driver_details(self, driver_id: str):
-        """Get detailed driver information"""
-        async with httpx.AsyncClient(follow_redirects=True) as client:
+        """Get a driver's info and ingested current season results"""
+        if self.current_season is None:
+            return await self.service.get_driver_details(driver_id)
+        driver, races = await asyncio.gather(
+            self.drivers.find_one({"driver_id": driver_id, "season": self.current_season}, {"_id": 0, "info": 1}),
+            self.races.find(
+                {"results.Driver.driverId": driver_id, "season": self.current_season},
+                {"_id": 0, "season": 1, "round": 1, "url": 1, "race_name": 1, "circuit": 1, "date": 1, "time": 1,
+                 "results": {"$elemMatch": {"Driver.driverId": driver_id}}},
+            ).sort("round", 1).to_list(length=None),
+        )
+        if not driver:
+            return None
+        return {
+            "driver_info": driver["info"],
+            "season_results": [
+                {
+                    "season": str(race["season"]),
+                    "round": str(race["round"]),
+                    "url": race.get("url"),
+                    "raceName": race["race_name"],
+                    "Circuit": race["circuit"],
+                    "date": race["date"],
+                    "time": race.get("time"),
+                    "Results": race.get("results", []),
+                }
+                for race in races
+            ]
+        }
+
+    async def get_drivers_details(self, driver_ids: List[str]):
+        """Get details for several drivers"""
+        if self.current_season is None:
+            return await self.service.get_drivers_details(driver_ids)
+        details = await asyncio.gather(*(self.get_driver_details(driver_id) for driver_id in driver_ids))
+        return dict(zip(driver_ids, details))
+
+    @timed(mongo_operation_duration, operation="store_season_results")
+    async def get_season_results(self) -> List[Dict]:
+        """Get every race of the ingested current season with full results"""
+        if self.current_season is None:
+            return [race_to_summary(race) for race in await self.service.fetch_season_results("current", cached=True)]
+        cursor = self.races.find(
+            {"season": self.current_season},
+            {"_id": 0, "season": 1, "round": 1, "race_name": 1, "results": 1},
+        ).sort("round", 1)
+        return await cursor.to_list(length=None)
+
+    async def status(self) -> Dict:
+        return {
+            "seasons": self.seasons,
+            "current_season": self.current_season,
+            "races": await self.races.estimated_document_count(),
+            "standings": await self.standings.estimated_document_count(),
+            "drivers": await self.drivers.estimated_document_count(),
+        }
+
+f1_store = F1DataStore(db, f1_service)
+
+# Cross-worker data sync
+DATA_CHANNEL = "data"
+DATA_STATE_KEY = "data:state"
+
+class DataSync:
+    """Shares the standings version and ingested seasons between workers over the backplane.
+
+    Followers read upstream data through the shared cache and never observe the standings themselves,
+    so whichever worker sees a change publishes it and the rest adopt it, invalidating their answer
+    caches, analytics and context summary just as the leader does.
+    """
+
+    def __init__(self, backplane, version: DataVersion, store: F1DataStore, worker_id: str):
+        self.backplane = backplane
+        self.version = version
+        self.store = store
+        self.worker_id = worker_id
+        self.task: Optional[asyncio.Task] = None
+        self.pending: set = set()
+        self.published = 0
+        self.applied = 0
+        version.listeners.append(self.notify)
+        store.listeners.append(self.notify)
+
+    def state(self) -> Dict:
+        return {
+            "origin": self.worker_id,
+            "standings_version": self.version.value,
+            "seasons": self.store.seasons,
+            "current_season": self.store.current_season,
+        }
+
+    def notify(self):
+        if self.backplane is None:
+            return
+        task = asyncio.create_task(self.publish())
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def publish(self):
+        message = dumps(self.state())
+        try:
+            # The stored copy lets workers that start later catch up
+            await self.backplane.set(DATA_STATE_KEY, message)
+            await self.backplane.publish(DATA_CHANNEL, message)
+            self.published += 1
+        except Exception as e:
+            logging.error(f"Error publishing data version: {e}")
+
+    def apply(self, message: bytes):
+        state = orjson.loads(message)
+        if state["origin"] == self.worker_id:
+            return
+        if state["standings_version"]:
+            self.version.adopt(state["standings_version"])
+        self.store.seasons = state["seasons"]
+        self.store.current_season = state["current_season"]
+        self.applied += 1
+
+    async def start(self):
+        if self.backplane is None or (self.task is not None and not self.task.done()):
+            return
+        try:
+            message = await self.backplane.get(DATA_STATE_KEY)
+            if message:
+                self.apply(message)
+        except Exception as e:
+            logging.error(f"Error loading shared data version: {e}")
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
             try:
-                # Get driver info
-                response = await client.get(f"{self.base_url}/current/drivers/{driver_id}.json")
-                data = response.json()
-                
-                if not data['MRData']['DriverTable']['Drivers']:
-                    return None
-                    
-                driver_data = data['MRData']['DriverTable']['Drivers'][0]
-                
-                # Get driver results this season
-                results_response = await client.get(f"{self.base_url}/current/drivers/{driver_id}/results.json")
-                results_data = results_response.json()
-                races = results_data['MRData']['RaceTable']['Races']
-                
-                return {
-                    "driver_info": driver_data,
-                    "season_results": races
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            try:
+                async for message in self.backplane.subscribe(DATA_CHANNEL):
+                    self.apply(message)
+            except Exception as e:
+                logging.error(f"Error applying shared data version: {e}")
+            await asyncio.sleep(1)
+
+    def stats(self) -> Dict:
+        return {
+            "shared": self.backplane is not None,
+            "standings_version": self.version.value,
+            "published": self.published,
+            "applied": self.applied,
+        }
+
+data_sync = DataSync(backplane, f1_service.standings_version, f1_store, leader.worker_id)
+
+class IngestRequest(BaseModel):
+    seasons: List[Annotated[str, Field(pattern=SEASON_PATTERN)]] = Field(min_length=1, max_length=INGEST_MAX_SEASONS)
+
+# Analytics configuration
+ANALYTICS_MAX_AGE = float(os.getenv("ANALYTICS_MAX_AGE", "3600"))
+ANALYTICS_CACHE_CONTROL = os.getenv("ANALYTICS_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=600")
+
+def mean_by(index: np.ndarray, values: np.ndarray, mask: np.ndarray, size: int) -> List[Optional[float]]:
+    """Per-group mean of values where mask holds, None for groups without any"""
+    totals = np.bincount(index, weights=np.where(mask, values, 0), minlength=size)
+    counts = np.bincount(index, weights=mask, minlength=size)
+    return [round(float(total / count), 2) if count else None for total, count in zip(totals, counts)]
+
+# Season analytics
+class SeasonAnalytics:
+    """Columnar view of one season's race results with every aggregate computed up front"""
+
+    def __init__(self, races: List[Dict]):
+        races = sorted(races, key=lambda race: int(race["round"]))
+        self.season = str(races[0]["season"]) if races else None
+        self.rounds = [int(race["round"]) for race in races]
+        self.race_names = [race.get("race_name") for race in races]
+
+        driver_index: Dict[str, int] = {}
+        constructor_index: Dict[str, int] = {}
+        self.driver_info: List[Dict] = []
+        self.constructor_names: List[str] = []
+        rows = []
+        for race_number, race in enumerate(races):
+            for result in race.get("results") or []:
+                driver, constructor = result["Driver"], result["Constructor"]
+                if driver["driverId"] not in driver_index:
+                    driver_index[driver["driverId"]] = len(driver_index)
+                    self.driver_info.append({})
+                if constructor["constructorId"] not in constructor_index:
+                    constructor_index[constructor["constructorId"]] = len(constructor_index)
+                    self.constructor_names.append(constructor["name"])
+                # Races are in round order, so the last team seen is the driver's current one
+                self.driver_info[driver_index[driver["driverId"]]] = {
+                    "driver_id": driver["driverId"],
+                    "code": driver.get("code"),
+                    "name": f"{driver.get('givenName', '')} {driver.get('familyName', '')}".strip(),
+                    "team": constructor["name"],
                 }
+                rows.append((
+                    race_number,
+                    driver_index[driver["driverId"]],
+                    constructor_index[constructor["constructorId"]],
+                    int(result.get("position", 0)),
+                    int(result.get("grid", 0)),
+                    float(result.get("points", 0)),
+                    result.get("positionText", result.get("position", "")).isdigit(),
+                ))
+        self.driver_ids = list(driver_index)
+        self.constructor_ids = list(constructor_index)
+
+        columns = np.array(rows, dtype=float).reshape(-1, 7)
+        self.race = columns[:, 0].astype(np.intp)
+        self.driver = columns[:, 1].astype(np.intp)
+        self.constructor = columns[:, 2].astype(np.intp)
+        self.position = columns[:, 3]
+        self.grid = columns[:, 4]
+        self.points = columns[:, 5]
+        self.classified = columns[:, 6].astype(bool)
+
+        self.drivers = self.entity_table(self.driver, len(self.driver_ids))
+        for row, info in zip(self.drivers, self.driver_info):
+            row.update(info)
+        self.drivers.sort(key=lambda row: (-row["points"], row["avg_finish"] or 99))
+        self.constructors = self.entity_table(self.constructor, len(self.constructor_ids))
+        for row, constructor_id, name in zip(self.constructors, self.constructor_ids, self.constructor_names):
+            row.update({"constructor_id": constructor_id, "name": name})
+        self.constructors.sort(key=lambda row: -row["points"])
+        self.progression = {
+            "drivers": self.points_progression(self.driver, self.driver_ids),
+            "constructors": self.points_progression(self.constructor, self.constructor_ids),
+        }
+        self.head_to_head = self.teammate_head_to_head()
+
+    def entity_table(self, index: np.ndarray, size: int) -> List[Dict]:
+        """Starts, points, wins, podiums, finishing averages and DNF rate per driver or constructor"""
+        starts = np.bincount(index, minlength=size)
+        points = np.bincount(index, weights=self.points, minlength=size)
+        wins = np.bincount(index, weights=self.position == 1, minlength=size)
+        podiums = np.bincount(index, weights=self.classified & (self.position <= 3), minlength=size)
+        dnfs = np.bincount(index, weights=~self.classified, minlength=size)
+        started_from_grid = self.grid > 0
+        avg_finish = mean_by(index, self.position, self.classified, size)
+        avg_grid = mean_by(index, self.grid, started_from_grid, size)
+        avg_gained = mean_by(index, self.grid - self.position, self.classified & started_from_grid, size)
+        return [
+            {
+                "starts": int(starts[i]),
+                "points": float(points[i]),
+                "wins": int(wins[i]),
+                "podiums": int(podiums[i]),
+                "dnfs": int(dnfs[i]),
+                "dnf_rate": round(float(dnfs[i] / starts[i]), 3) if starts[i] else None,
+                "avg_finish": avg_finish[i],
+                "avg_grid": avg_grid[i],
+                "avg_positions_gained": avg_gained[i],
+            }
+            for i in range(size)
+        ]
+
+    def points_progression(self, index: np.ndarray, ids: List[str]) -> Dict:
+        """Cumulative championship points after each round"""
+        per_round = np.zeros((len(self.rounds), len(ids)))
+        np.add.at(per_round, (self.race, index), self.points)
+        cumulative = per_round.cumsum(axis=0)
+        return {
+            "rounds": self.rounds,
+            "race_names": self.race_names,
+            "series": {entity_id: cumulative[:, i].tolist() for i, entity_id in enumerate(ids)},
+        }
+
+    def teammate_head_to_head(self) -> List[Dict]:
+        """Race finishing head-to-head for every pair of drivers who shared a car in the same race"""
+        shape = (len(self.rounds), len(self.driver_ids))
+        position = np.full(shape, np.inf)
+        team = np.full(shape, -1)
+        position[self.race, self.driver] = self.position
+        team[self.race, self.driver] = self.constructor
+
+        pairs = []
+        for constructor in range(len(self.constructor_ids)):
+            members = np.unique(self.driver[self.constructor == constructor])
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    together = (team[:, first] == constructor) & (team[:, second] == constructor)
+                    races = int(together.sum())
+                    if not races:
+                        continue
+                    pairs.append({
+                        "constructor_id": self.constructor_ids[constructor],
+                        "team": self.constructor_names[constructor],
+                        "drivers": [self.driver_ids[first], self.driver_ids[second]],
+                        "races": races,
+                        "wins": [
+                            int((together & (position[:, first] < position[:, second])).sum()),
+                            int((together & (position[:, second] < position[:, first])).sum()),
+                        ],
+                    })
+        return pairs
+
+# Analytics Service
+class AnalyticsService:
+    """Rebuilds SeasonAnalytics once per standings version so requests only read precomputed aggregates"""
+
+    def __init__(self, store: F1DataStore, version: DataVersion, max_age: float = ANALYTICS_MAX_AGE):
+        self.store = store
+        self.version = version
+        self.max_age = max_age
+        self.analytics: Optional[SeasonAnalytics] = None
+        self.analytics_version: Optional[str] = None
+        self.built_at = 0.0
+        self.builds = 0
+        self.lock = asyncio.Lock()
+
+    def is_current(self) -> bool:
+        return (self.analytics is not None and self.analytics_version == self.version.value
+                and time.time() - self.built_at < self.max_age)
+
+    async def get(self) -> Optional[SeasonAnalytics]:
+        if self.is_current():
+            return self.analytics
+        async with self.lock:
+            if not self.is_current():
+                try:
+                    version = self.version.value
+                    races = await self.store.get_season_results()
+                    # Vectorizing a season is CPU work; keep it off the event loop
+                    self.analytics = await asyncio.to_thread(SeasonAnalytics, races)
+                    self.analytics_version = version
+                    self.built_at = time.time()
+                    self.builds += 1
+                except Exception as e:
+                    # Keep serving the previous build, if any
+                    logging.error(f"Error building season analytics: {e}")
+        return self.analytics
+
+    def stats(self) -> Dict:
+        return {
+            "season": self.analytics.season if self.analytics else None,
+            "version": self.analytics_version,
+            "built_at": datetime.fromtimestamp(self.built_at, timezone.utc).isoformat() if self.built_at else None,
+            "builds": self.builds,
+            "results": len(self.analytics.position) if self.analytics else 0,
+        }
+
+analytics = AnalyticsService(f1_store, f1_service.standings_version)
+
+# Prefetch scheduler configuration
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_HOT_INTERVAL = float(os.getenv("PREFETCH_HOT_INTERVAL", "120"))
+PREFETCH_WEEKEND_INTERVAL = float(os.getenv("PREFETCH_WEEKEND_INTERVAL", "900"))
+PREFETCH_IDLE_INTERVAL = float(os.getenv("PREFETCH_IDLE_INTERVAL", "3600"))
+PREFETCH_POST_RACE_HOURS = float(os.getenv("PREFETCH_POST_RACE_HOURS", "48"))
+PREFETCH_PRE_RACE_HOURS = float(os.getenv("PREFETCH_PRE_RACE_HOURS", "72"))
+PREFETCH_HOT_PATHS = int(os.getenv("PREFETCH_HOT_PATHS", "20"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+CURRENT_SCHEDULE_PATH = "/current.json"
+
+def race_start(race: Dict) -> Optional[datetime]:
+    """Start of a scheduled race as an aware UTC datetime"""
+    try:
+        return datetime.fromisoformat(f"{race['date']}T{race.get('time', '00:00:00Z').replace('Z', '+00:00')}")
+    except (KeyError, ValueError):
+        return None
+
+# Background prefetch
+class PrefetchScheduler:
+    """Keeps standings, recent races and the most requested driver pages warm ahead of user requests,
+    refreshing every few minutes after a race and backing off to hourly mid-week"""
+
+    def __init__(self, service: F1DataService, store: F1DataStore, analytics: Optional[AnalyticsService] = None,
+                 leader: Optional[LeaderElection] = None, hot_paths: int = PREFETCH_HOT_PATHS,
+                 concurrency: int = PREFETCH_CONCURRENCY):
+        self.service = service
+        self.store = store
+        self.analytics = analytics
+        self.leader = leader
+        self.hot_paths = hot_paths
+        self.concurrency = concurrency
+        self.task: Optional[asyncio.Task] = None
+        self.schedule: List[datetime] = []
+        self.phase = "idle"
+        self.next_run: Optional[datetime] = None
+        self.runs = 0
+        self.refreshed = 0
+        self.errors = 0
+        self.ingests = 0
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def interval(self, now: datetime) -> tuple:
+        """Pick the refresh cadence from where now falls in the race calendar"""
+        past = [start for start in self.schedule if start <= now]
+        upcoming = [start for start in self.schedule if start > now]
+        if past and now - past[-1] <= timedelta(hours=PREFETCH_POST_RACE_HOURS):
+            return "post_race", PREFETCH_HOT_INTERVAL
+        if upcoming and upcoming[0] - now <= timedelta(hours=PREFETCH_PRE_RACE_HOURS):
+            # Don't sleep through the start of the post-race window
+            until_race = (upcoming[0] - now).total_seconds()
+            return "race_weekend", max(1.0, min(PREFETCH_WEEKEND_INTERVAL, until_race))
+        return "idle", PREFETCH_IDLE_INTERVAL
+
+    async def load_schedule(self):
+        try:
+            data = await self.service._get_json(CURRENT_SCHEDULE_PATH)
+            starts = (race_start(race) for race in data['MRData']['RaceTable']['Races'])
+            self.schedule = sorted(start for start in starts if start is not None)
+        except Exception as e:
+            logging.error(f"Error loading race calendar: {e}")
+
+    async def run_once(self):
+        """Refresh the hot upstream paths, re-ingesting the current season if the standings moved
+        and rebuilding analytics for the new data"""
+        self.runs += 1
+        await self.load_schedule()
+        version = self.service.standings_version.value
+        paths = [CURRENT_STANDINGS_PATH, f"/current/results.json?limit={ERGAST_PAGE_SIZE}&offset=0"]
+        paths += [path for path in self.service.hot_paths(self.hot_paths) if path not in paths]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(path: str):
+            async with semaphore:
+                try:
+                    await self.service._refresh(path)
+                    self.refreshed += 1
+                except Exception as e:
+                    self.errors += 1
+                    logging.error(f"Error prefetching {path}: {e}")
+
+        await asyncio.gather(*(refresh(path) for path in paths))
+        self.service.decay_request_counts()
+        if self.store.current_season is not None and self.service.standings_version.value != version:
+            self.ingests += 1
+            await self.store.ingest_seasons(["current"])
+        if self.analytics is not None:
+            await self.analytics.get()
+
+    async def _run(self):
+        while True:
+            if self.leader is not None and not self.leader.is_leader:
+                # The leader prefetches into the shared cache; check back in case it goes away
+                self.phase = "follower"
+                await asyncio.sleep(self.leader.ttl)
+                continue
+            try:
+                await self.run_once()
             except Exception as e:
-                logging.error(f"Error fetching driver details: {e}")
+                logging.error(f"Error in prefetch cycle: {e}")
+            now = datetime.now(timezone.utc)
+            self.phase, delay = self.interval(now)
+            self.next_run = now + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict:
+        return {
+            "phase": self.phase,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "scheduled_races": len(self.schedule),
+            "runs": self.runs,
+            "refreshed": self.refreshed,
+            "errors": self.errors,
+            "ingests": self.ingests,
+            "tracked_paths": len(self.service.request_counts),
+        }
+
+prefetcher = PrefetchScheduler(f1_service, f1_store, analytics, leader)
+
+# Pit Wall LLM backends
+PIT_WALL_LLM_BACKEND = os.getenv("PIT_WALL_LLM_BACKEND", "emergent")
+FAKE_LLM_FIRST_TOKEN_DELAY = float(os.getenv("FAKE_LLM_FIRST_TOKEN_DELAY", "0.2"))
+FAKE_LLM_TOKEN_DELAY = float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.02"))
+
+PIT_WALL_SYSTEM_PROMPT = """You are the "Pit Wall" - an expert F1 AI assistant with deep knowledge of Formula 1 racing. 
+    You provide intelligent insights, strategic analysis, and foresights about drivers, teams, race performance, and F1 data.
+    
+    Your expertise includes:
+    - Driver performance analysis and comparisons
+    - Race strategy and tire management
+    - Weather impact on race outcomes  
+    - Historical F1 data and statistics
+    - Team dynamics and championship battles
+    - Technical regulations and car performance
+    - Track characteristics and setup optimization
+    
+    Respond in an engaging, knowledgeable tone as if you're a seasoned F1 strategist on the pit wall.
+    Keep responses concise but insightful. Use F1 terminology naturally."""
+
+PIT_WALL_MAX_SESSIONS = int(os.getenv("PIT_WALL_MAX_SESSIONS", "500"))
+PIT_WALL_SESSION_IDLE_TIMEOUT = float(os.getenv("PIT_WALL_SESSION_IDLE_TIMEOUT", "1800"))
+
+PIT_WALL_FALLBACK_RESPONSE = "Sorry, I'm having trouble connecting to the pit wall radio right now. Please try again in a moment."
+
+class PitWallStreamInterrupted(Exception):
+    """The model failed after part of the reply had already been streamed"""
+
+class ChatSession:
+    __slots__ = ("chat", "system_message", "last_used", "lock")
+
+    def __init__(self, chat, system_message: str):
+        self.chat = chat
+        self.system_message = system_message
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+class ChatSessionPool:
+    """Session-keyed LlmChat handles with LRU eviction and an idle timeout, so a conversation
+    reuses one handle instead of building a new client for every message"""
+
+    def __init__(self, factory, max_sessions: int = PIT_WALL_MAX_SESSIONS,
+                 idle_timeout: float = PIT_WALL_SESSION_IDLE_TIMEOUT):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get(self, session_id: str, system_message: str) -> ChatSession:
+        self.expire_idle()
+        session = self.sessions.get(session_id)
+        if session is not None and session.system_message == system_message:
+            self.reused += 1
+        else:
+            # A changed system prompt (new data summary or client context) needs a fresh handle
+            session = ChatSession(self.factory(session_id, system_message), system_message)
+            self.sessions[session_id] = session
+            self.created += 1
+        session.last_used = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+        return session
+
+    def expire_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        # Least recently used sessions sit at the front, so stop at the first live one
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_used >= cutoff:
+                break
+            del self.sessions[session_id]
+            self.evicted += 1
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+        }
+
+class EmergentLlmBackend:
+    """GPT-4o through emergentintegrations' LlmChat"""
+
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+        self.sessions = ChatSessionPool(self.create_chat)
+
+    def create_chat(self, session_id: str, system_message: str):
+        return LlmChat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=system_message
+        ).with_model("openai", "gpt-4o").with_max_tokens(2048)
+
+    async def complete(self, session_id: str, system_message: str, message: str) -> str:
+        session = self.sessions.get(session_id, system_message)
+        # One message at a time per handle keeps the conversation history consistent
+        async with session.lock:
+            return await session.chat.send_message(UserMessage(text=message))
+
+    async def stream(self, session_id: str, system_message: str, message: str) -> AsyncIterator[str]:
+        # LlmChat only exposes whole completions, so the reply arrives as a single chunk
+        yield await self.complete(session_id, system_message, message)
+
+class FakeLlmBackend:
+    """Local stand-in that yields a canned reply word by word with configurable delays"""
+
+    def __init__(self, first_token_delay: float = FAKE_LLM_FIRST_TOKEN_DELAY, token_delay: float = FAKE_LLM_TOKEN_DELAY):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    def reply(self, message: str) -> str:
+        return (
+            f"Copy that, you asked: {message} "
+            "From the pit wall, tyre degradation and track position look decisive here, "
+            "so we'd keep an eye on the undercut window and the gaps in clean air."
+        )
+
+    async def complete(self, session_id: str, system_message: str, message: str) -> str:
+        return "".join([token async for token in self.stream(session_id, system_message, message)])
+
+    async def stream(self, session_id: str, system_message: str, message: str) -> AsyncIterator[str]:
+        await asyncio.sleep(self.first_token_delay)
+        words = self.reply(message).split(" ")
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield word if index == len(words) - 1 else f"{word} "
+
+def create_llm_backend():
+    if PIT_WALL_LLM_BACKEND == "fake":
+        return FakeLlmBackend()
+    return EmergentLlmBackend(os.getenv("OPENAI_API_KEY"))
+
+# Pit Wall response cache configuration
+PIT_WALL_CACHE_TTL = float(os.getenv("PIT_WALL_CACHE_TTL", "900"))
+PIT_WALL_CACHE_MAX_ENTRIES = int(os.getenv("PIT_WALL_CACHE_MAX_ENTRIES", "1000"))
+PIT_WALL_CACHE_SIMILARITY = float(os.getenv("PIT_WALL_CACHE_SIMILARITY", "0"))
+PIT_WALL_CACHE_DIMENSIONS = 512
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lower-case, drop punctuation and collapse whitespace so trivially different questions match"""
+    if not text:
+        return ""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+def embed_text(text: str, dimensions: int = PIT_WALL_CACHE_DIMENSIONS) -> np.ndarray:
+    """Unit-length hashed bag of words and word bigrams, a cheap local stand-in for an embedding model"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    words = text.split()
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        vector[int.from_bytes(hashlib.md5(feature.encode()).digest()[:4], "little") % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class PitWallCacheEntry:
+    __slots__ = ("response", "stored_at", "context_key", "vector")
+
+    def __init__(self, response: str, context_key: str, vector: Optional[np.ndarray]):
+        self.response = response
+        self.stored_at = time.time()
+        self.context_key = context_key
+        self.vector = vector
+
+class PitWallResponseCache:
+    """Answers keyed on normalized question + context, optionally matched by similarity,
+    and dropped wholesale whenever the standings change"""
+
+    def __init__(self, version: DataVersion, ttl: float = PIT_WALL_CACHE_TTL,
+                 max_entries: int = PIT_WALL_CACHE_MAX_ENTRIES, similarity: float = PIT_WALL_CACHE_SIMILARITY):
+        self.version = version
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.entries: "OrderedDict[tuple, PitWallCacheEntry]" = OrderedDict()
+        self.entries_version = version.value
+        self.index_keys: List[tuple] = []
+        self.index_matrix: Optional[np.ndarray] = None
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self.entries_version != self.version.value:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.index_matrix = None
+            self.entries_version = self.version.value
+
+    def get(self, message: str, context: Optional[str] = None) -> Optional[str]:
+        self._check_version()
+        question, context_key = normalize_text(message), normalize_text(context)
+        entry = self.entries.get((question, context_key))
+        if entry is not None and time.time() - entry.stored_at < self.ttl:
+            self.entries.move_to_end((question, context_key))
+            self.exact_hits += 1
+            return entry.response
+        if self.similarity > 0:
+            response = self._get_similar(question, context_key)
+            if response is not None:
+                self.similar_hits += 1
+                return response
+        self.misses += 1
+        return None
+
+    def _get_similar(self, question: str, context_key: str) -> Optional[str]:
+        if self.index_matrix is None:
+            self.index_keys = [key for key, entry in self.entries.items() if entry.vector is not None]
+            if not self.index_keys:
+                return None
+            self.index_matrix = np.stack([self.entries[key].vector for key in self.index_keys])
+        scores = self.index_matrix @ embed_text(question)
+        for position in np.argsort(scores)[::-1]:
+            if scores[position] < self.similarity:
                 return None
+            entry = self.entries.get(self.index_keys[position])
+            if entry is not None and entry.context_key == context_key and time.time() - entry.stored_at < self.ttl:
+                return entry.response
+        return None
+
+    def set(self, message: str, context: Optional[str], response: str):
+        self._check_version()
+        question, context_key = normalize_text(message), normalize_text(context)
+        vector = embed_text(question) if self.similarity > 0 else None
+        self.entries[(question, context_key)] = PitWallCacheEntry(response, context_key, vector)
+        self.entries.move_to_end((question, context_key))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.index_matrix = None
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self.entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "data_version": self.entries_version,
+        }
+
+# Pit Wall context configuration
+PIT_WALL_CONTEXT_ENABLED = os.getenv("PIT_WALL_CONTEXT_ENABLED", "true").lower() == "true"
+PIT_WALL_CONTEXT_TOKENS = int(os.getenv("PIT_WALL_CONTEXT_TOKENS", "300"))
+PIT_WALL_CLIENT_CONTEXT_TOKENS = int(os.getenv("PIT_WALL_CLIENT_CONTEXT_TOKENS", "200"))
+PIT_WALL_CONTEXT_MAX_AGE = float(os.getenv("PIT_WALL_CONTEXT_MAX_AGE", "300"))
+CHARS_PER_TOKEN = 4
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Trim text to a rough token budget (about four characters per token)"""
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + "..."
+
+class PitWallContextBuilder:
+    """Condenses cached standings and the latest result into a token-budgeted prompt summary,
+    rebuilt only when the standings version changes"""
+
+    def __init__(self, store: F1DataStore, version: DataVersion, token_budget: int = PIT_WALL_CONTEXT_TOKENS,
+                 max_age: float = PIT_WALL_CONTEXT_MAX_AGE):
+        self.store = store
+        self.version = version
+        self.token_budget = token_budget
+        self.max_age = max_age
+        self.summary = ""
+        self.summary_version: Optional[str] = None
+        self.built_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def is_current(self) -> bool:
+        return self.summary_version == self.version.value and time.time() - self.built_at < self.max_age
+
+    async def build(self) -> str:
+        if self.is_current():
+            return self.summary
+        async with self.lock:
+            if not self.is_current():
+                standings, race = await asyncio.gather(
+                    self.store.get_current_standings(),
+                    self.store.get_latest_race(top=3),
+                )
+                self.summary = self.summarize(standings, race)
+                self.summary_version = self.version.value
+                self.built_at = time.time()
+        return self.summary
 
-f1_service = F1DataService()
+    def summarize(self, standings: List[Dict], race: Optional[Dict]) -> str:
+        lines = []
+        if race:
+            podium = ", ".join(
+                f"P{result['position']} {result['code'] or result['driver']} ({result['team']})"
+                for result in race.get("results", [])
+            )
+            lines.append(f"Latest race: {race['season']} {race['race_name']} (round {race['round']}): {podium}.")
+        if standings:
+            lines.append("Drivers' championship:")
+            lines.extend(
+                f"{driver['position']}. {driver['name']} ({driver['team']}) {driver['points']:g} pts"
+                for driver in standings
+            )
+        # Keep whole lines in priority order until the budget runs out
+        budget = self.token_budget * CHARS_PER_TOKEN
+        kept = []
+        for line in lines:
+            if budget - len(line) - 1 < 0:
+                break
+            kept.append(line)
+            budget -= len(line) + 1
+        return "\n".join(kept)
+
+# LLM admission control configuration
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_QUEUE_DEPTH = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "32"))
+LLM_MAX_QUEUED_PER_SESSION = int(os.getenv("LLM_MAX_QUEUED_PER_SESSION", "2"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "20"))
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int = 5):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionTicket:
+    """A held LLM slot; releasing it more than once is harmless"""
+    __slots__ = ("controller", "released")
+
+    def __init__(self, controller: "LlmAdmissionController"):
+        self.controller = controller
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller.release()
+
+class LlmAdmissionController:
+    """Bounded pool of outbound LLM slots. Waiting sessions are served round-robin so one chatty
+    session cannot starve the rest, and callers are shed immediately once the queue is full."""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue_depth: int = LLM_MAX_QUEUE_DEPTH,
+                 max_queued_per_session: int = LLM_MAX_QUEUED_PER_SESSION, queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_queued_per_session = max_queued_per_session
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.queues: "OrderedDict[str, deque]" = OrderedDict()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.peak_waiting = 0
+
+    async def acquire(self, session_id: str) -> AdmissionTicket:
+        if self.active < self.max_concurrency and not self.waiting:
+            self.active += 1
+            self.admitted += 1
+            return AdmissionTicket(self)
+        session_queue = self.queues.get(session_id)
+        if self.waiting >= self.max_queue_depth:
+            self.rejected += 1
+            raise AdmissionRejected("Pit wall is at capacity")
+        if session_queue is not None and len(session_queue) >= self.max_queued_per_session:
+            self.rejected += 1
+            raise AdmissionRejected("Too many pending questions for this session")
+
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(session_id, deque()).append(future)
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait ended
+                self.release()
+            else:
+                self._forget(session_id, future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            raise AdmissionRejected("Timed out waiting for the pit wall")
+        return AdmissionTicket(self)
+
+    def release(self):
+        self.active -= 1
+        while self.active < self.max_concurrency and self.queues:
+            session_id, session_queue = next(iter(self.queues.items()))
+            future = session_queue.popleft()
+            self.waiting -= 1
+            if session_queue:
+                self.queues.move_to_end(session_id)
+            else:
+                del self.queues[session_id]
+            if not future.done():
+                self.active += 1
+                self.admitted += 1
+                future.set_result(None)
+
+    def _forget(self, session_id: str, future: asyncio.Future):
+        session_queue = self.queues.get(session_id)
+        if session_queue is not None and future in session_queue:
+            session_queue.remove(future)
+            self.waiting -= 1
+            if not session_queue:
+                del self.queues[session_id]
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "waiting_sessions": len(self.queues),
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+def count_llm_tokens(prompt: str, completion: str):
+    # LlmChat doesn't report usage, so tokens are estimated from characters
+    llm_tokens_total.inc(len(prompt) // CHARS_PER_TOKEN, direction="prompt")
+    llm_tokens_total.inc(len(completion) // CHARS_PER_TOKEN, direction="completion")
 
 # AI Pit Wall Service
 class PitWallService:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
+    def __init__(self, backend=None, cache: Optional[PitWallResponseCache] = None,
+                 context_builder: Optional[PitWallContextBuilder] = None,
+                 admission: Optional[LlmAdmissionController] = None):
+        self.backend = backend if backend is not None else create_llm_backend()
+        self.cache = cache
+        self.context_builder = context_builder
+        self.admission = admission if admission is not None else LlmAdmissionController()
+        # Session -> exchanges answered from the cache that its LLM chat has not seen yet
+        self.sessions_seen: "OrderedDict[str, List[tuple]]" = OrderedDict()
+
+    def use_cache(self, session_id: str) -> bool:
+        """Only a session's first question may be answered from or stored in the shared cache;
+        later turns depend on that session's own conversation history"""
+        first_turn = session_id not in self.sessions_seen
+        self.sessions_seen.setdefault(session_id, [])
+        self.sessions_seen.move_to_end(session_id)
+        while len(self.sessions_seen) > PIT_WALL_MAX_SESSIONS:
+            self.sessions_seen.popitem(last=False)
+        return self.cache is not None and first_turn
+
+    def serve_cached(self, session_id: str, message: str, response: str) -> str:
+        unseen = self.sessions_seen.get(session_id)
+        if unseen is not None:
+            unseen.append((message, response))
+        return response
+
+    def prompt_for(self, session_id: str, message: str) -> str:
+        """The user's message, preceded by any exchange the session was answered from the cache,
+        so its LLM chat history still matches what the user saw"""
+        unseen = self.sessions_seen.get(session_id)
+        if not unseen:
+            return message
+        transcript = "\n".join(f"User: {question}\nPit Wall: {answer}" for question, answer in unseen)
+        return f"Earlier in this conversation:\n{transcript}\n\nUser: {message}"
+
+    def delivered(self, session_id: str):
+        unseen = self.sessions_seen.get(session_id)
+        if unseen:
+            unseen.clear()
+
+    async def prepare_system_message(self, context: Optional[str] = None) -> str:
+        """System prompt with the server-side data summary and the (trimmed) client context"""
+        live_context = ""
+        if self.context_builder is not None:
+            try:
+                live_context = await self.context_builder.build()
+            except Exception as e:
+                logging.error(f"Error building Pit Wall context: {e}")
+        if context:
+            context = truncate_to_tokens(context, PIT_WALL_CLIENT_CONTEXT_TOKENS)
+        return self.build_system_message(context, live_context)
+
+    def build_system_message(self, context: Optional[str] = None, live_context: Optional[str] = None) -> str:
+        system_message = PIT_WALL_SYSTEM_PROMPT
+        if live_context:
+            system_message += f"\n\nCurrent F1 data:\n{live_context}"
+        if context:
+            system_message += f"\n\nCurrent context: {context}"
+        return system_message
         
     async def get_pit_wall_response(self, message: str, session_id: str, context: Optional[str] = None):
-        """Get AI response from the Pit Wall"""
+        """Get AI response from the Pit Wall; raises AdmissionRejected when the LLM pool is saturated"""
+        use_cache = self.use_cache(session_id)
+        cached = self.cache.get(message, context) if use_cache else None
+        if cached is not None:
+            return self.serve_cached(session_id, message, cached)
+        ticket = await self.admission.acquire(session_id)
         try:
-            system_message = """You are the "Pit Wall" - an expert F1 AI assistant with deep knowledge of Formula 1 racing. 
-            You provide intelligent insights, strategic analysis, and foresights about drivers, teams, race performance, and F1 data.
-            
-            Your expertise includes:
-            - Driver performance analysis and comparisons
-            - Race strategy and tire management
-            - Weather impact on race outcomes  
-            - Historical F1 data and statistics
-            - Team dynamics and championship battles
-            - Technical regulations and car performance
-            - Track characteristics and setup optimization
-            
-            Respond in an engaging, knowledgeable tone as if you're a seasoned F1 strategist on the pit wall.
-            Keep responses concise but insightful. Use F1 terminology naturally."""
-            
-            if context:
-                system_message += f"\n\nCurrent context: {context}"
-            
-            # Create LLM chat instance
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=session_id,
-                system_message=system_message
-            ).with_model("openai", "gpt-4o").with_max_tokens(2048)
-            
-            user_message = UserMessage(text=message)
-            response = await chat.send_message(user_message)
-            
+            system_message = await self.prepare_system_message(context)
+            prompt = self.prompt_for(session_id, message)
+            started = time.perf_counter()
+            response = await self.backend.complete(session_id, system_message, prompt)
+            llm_request_duration.observe(time.perf_counter() - started, mode="complete")
+            self.delivered(session_id)
+            count_llm_tokens(system_message + prompt, response)
+            if use_cache:
+                self.cache.set(message, context, response)
             return response
         except Exception as e:
+            llm_errors_total.inc(mode="complete")
             logging.error(f"Error getting Pit Wall response: {e}")
-            return "Sorry, I'm having trouble connecting to the pit wall radio right now. Please try again in a moment."
+            return PIT_WALL_FALLBACK_RESPONSE
+        finally:
+            ticket.release()
+
+    async def open_pit_wall_stream(self, message: str, session_id: str, context: Optional[str] = None):
+        """Admit a streaming request up front (raising AdmissionRejected if shed) and return the
+        token iterator plus the ticket the caller must release if the iterator is never consumed"""
+        use_cache = self.use_cache(session_id)
+        cached = self.cache.get(message, context) if use_cache else None
+        if cached is not None:
+            return self._replay(self.serve_cached(session_id, message, cached)), None
+        ticket = await self.admission.acquire(session_id)
+        return self._stream_reply(message, session_id, context, ticket, use_cache), ticket
+
+    async def _replay(self, response: str) -> AsyncIterator[str]:
+        yield response
+
+    async def _stream_reply(self, message: str, session_id: str, context: Optional[str],
+                            ticket: AdmissionTicket, use_cache: bool) -> AsyncIterator[str]:
+        """Stream the Pit Wall response chunk by chunk as the model produces it"""
+        sent_any = False
+        chunks = []
+        try:
+            system_message = await self.prepare_system_message(context)
+            prompt = self.prompt_for(session_id, message)
+            started = time.perf_counter()
+            async for token in self.backend.stream(session_id, system_message, prompt):
+                if not sent_any:
+                    llm_first_token_duration.observe(time.perf_counter() - started)
+                sent_any = True
+                chunks.append(token)
+                yield token
+            llm_request_duration.observe(time.perf_counter() - started, mode="stream")
+            self.delivered(session_id)
+            count_llm_tokens(system_message + prompt, "".join(chunks))
+            if use_cache:
+                self.cache.set(message, context, "".join(chunks))
+        except Exception as e:
+            llm_errors_total.inc(mode="stream")
+            logging.error(f"Error streaming Pit Wall response: {e}")
+            if sent_any:
+                raise PitWallStreamInterrupted("Pit Wall stream interrupted") from e
+            yield PIT_WALL_FALLBACK_RESPONSE
+        finally:
+            ticket.release()
+
+pit_wall = PitWallService(
+    cache=PitWallResponseCache(f1_service.standings_version),
+    context_builder=PitWallContextBuilder(f1_store, f1_service.standings_version) if PIT_WALL_CONTEXT_ENABLED else None,
+)
+
+# HTTP caching
+STANDINGS_CACHE_CONTROL = os.getenv("STANDINGS_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+RACES_CACHE_CONTROL = os.getenv("RACES_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+DRIVER_CACHE_CONTROL = os.getenv("DRIVER_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=600")
+REPRESENTATION_HISTORY_SIZE = 1024
+
+# Last-Modified is when a URL first served its current body, keyed by URL and bounded LRU-style
+representation_seen: "OrderedDict[str, tuple]" = OrderedDict()
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
+
+def conditional_response(request: Request, content, cache_control: str, headers: Optional[Dict] = None) -> Response:
+    """JSON response with a content-hash ETag and Last-Modified, answering 304 to matching revalidations"""
+    body = dumps(content)
+    # Weak, because compression middleware may re-encode the body on the way out
+    etag = f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+    key = str(request.url)
+    seen = representation_seen.get(key)
+    if seen is None or seen[0] != etag:
+        seen = (etag, time.time())
+    representation_seen[key] = seen
+    representation_seen.move_to_end(key)
+    while len(representation_seen) > REPRESENTATION_HISTORY_SIZE:
+        representation_seen.popitem(last=False)
+
+    response_headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(seen[1], usegmt=True),
+        "Cache-Control": cache_control,
+        **(headers or {}),
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, etag)
+    else:
+        try:
+            if_modified_since = parsedate_to_datetime(request.headers.get("if-modified-since", ""))
+            not_modified = int(seen[1]) <= if_modified_since.timestamp()
+        except (TypeError, ValueError):
+            not_modified = False
+    if not_modified:
+        return Response(status_code=304, headers=response_headers)
+    return Response(body, media_type="application/json", headers=response_headers)
+
+# Chat persistence configuration
+CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "50"))
+CHAT_WRITE_FLUSH_INTERVAL = float(os.getenv("CHAT_WRITE_FLUSH_INTERVAL", "1"))
+CHAT_WRITE_MAX_BUFFER = int(os.getenv("CHAT_WRITE_MAX_BUFFER", "5000"))
+
+# Write-behind persistence
+class WriteBehindBuffer:
+    """Buffers documents in memory and writes them with insert_many once a batch fills up
+    or the flush interval elapses, keeping the database round trip off the request path"""
+
+    def __init__(self, collection, batch_size: int = CHAT_WRITE_BATCH_SIZE,
+                 flush_interval: float = CHAT_WRITE_FLUSH_INTERVAL, max_buffer: int = CHAT_WRITE_MAX_BUFFER):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.pending: List[Dict] = []
+        self.task: Optional[asyncio.Task] = None
+        self.batch_ready = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
 
-pit_wall = PitWallService()
+    async def stop(self):
+        """Stop the flush loop and write out whatever is still buffered"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+
+    def add(self, document: Dict):
+        if len(self.pending) >= self.max_buffer:
+            # The database has been unreachable for a while; shed the oldest record rather than grow unbounded
+            self.pending.pop(0)
+            self.dropped += 1
+        self.pending.append(document)
+        if len(self.pending) >= self.batch_size:
+            self.batch_ready.set()
+
+    def pending_for(self, field: str, value) -> List[Dict]:
+        return [document for document in self.pending if document.get(field) == value]
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.batch_ready.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self.flush_lock:
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                del self.pending[:self.batch_size]
+                try:
+                    await self.insert_batch(batch)
+                    self.written += len(batch)
+                    self.batches += 1
+                except BulkWriteError as e:
+                    # Per-document failures would fail again on retry, so count and drop them
+                    failures = len(e.details.get("writeErrors", []))
+                    self.written += len(batch) - failures
+                    self.failed += failures
+                    logging.error(f"Error writing {failures} buffered documents: {e}")
+                except Exception as e:
+                    # Put the batch back in front and retry on the next flush
+                    self.pending[:0] = batch
+                    logging.error(f"Error flushing write-behind buffer: {e}")
+                    return
+
+    @timed(mongo_operation_duration, operation="chat_insert")
+    async def insert_batch(self, batch: List[Dict]):
+        await self.collection.insert_many(batch, ordered=False)
+
+    def stats(self) -> Dict:
+        return {
+            "buffered": len(self.pending),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+        }
+
+chat_writer = WriteBehindBuffer(db.pit_wall_chats)
+
+# Chat history configuration
+CHAT_HISTORY_MAX_LIMIT = int(os.getenv("CHAT_HISTORY_MAX_LIMIT", "200"))
+CHAT_RETENTION_DAYS = float(os.getenv("CHAT_RETENTION_DAYS", "0"))
+CHAT_HISTORY_PROJECTION = {"_id": 0, "id": 1, "session_id": 1, "message": 1, "response": 1, "context": 1, "timestamp": 1}
+
+def chat_sort_key(chat: Dict) -> tuple:
+    """(timestamp, id) at MongoDB's millisecond precision, so buffered and stored chats order alike"""
+    timestamp = chat["timestamp"]
+    return timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000), chat["id"]
+
+def encode_chat_cursor(chat: Dict) -> str:
+    timestamp, chat_id = chat_sort_key(chat)
+    return f"{timestamp.isoformat()},{chat_id}"
+
+def decode_chat_cursor(cursor: str) -> tuple:
+    timestamp, separator, chat_id = cursor.partition(",")
+    if not separator or not chat_id:
+        raise ValueError(cursor)
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed, chat_id
+
+async def ensure_chat_indexes():
+    """Index history lookups and optionally expire old chats"""
+    try:
+        await db.pit_wall_chats.create_index([("session_id", 1), ("timestamp", -1), ("id", -1)])
+        if CHAT_RETENTION_DAYS > 0:
+            await db.pit_wall_chats.create_index(
+                "timestamp", expireAfterSeconds=int(CHAT_RETENTION_DAYS * 86400)
+            )
+    except Exception as e:
+        logging.error(f"Error creating pit_wall_chats indexes: {e}")
+
+# Metrics collectors read at scrape time
+metrics.gauge_callback("live_connections", "Open live timing WebSocket connections", lambda: len(manager.active_connections))
+metrics.gauge_callback(
+    "live_queued_frames", "Frames waiting in live subscriber queues", lambda: {
+        ("total",): sum(subscriber.queue.qsize() for subscriber in manager.active_connections.values()),
+        ("max",): max((subscriber.queue.qsize() for subscriber in manager.active_connections.values()), default=0),
+    }, ("stat",))
+metrics.counter_callback("live_frames_produced_total", "Live timing frames produced", lambda: live_broadcaster.frames_produced)
+metrics.counter_callback("live_dropped_frames_total", "Live frames dropped for slow subscribers", lambda: manager.dropped_frames)
+metrics.counter_callback(
+    "ergast_cache_lookups_total", "Upstream response cache lookups by result", lambda: {
+        ("fresh",): f1_service.cache.hits, ("stale",): f1_service.cache.stale_hits,
+        ("miss",): f1_service.cache.misses, ("shared",): f1_service.cache.l2_hits,
+    }, ("result",))
+metrics.gauge_callback(
+    "ergast_circuit_state", "Upstream circuit breaker state (1 for the current state)",
+    lambda: {(state,): int(f1_service.breaker.state == state) for state in ("closed", "open", "half_open")}, ("state",))
+metrics.gauge_callback("ergast_cache_entries", "Entries in the in-process upstream cache", lambda: len(f1_service.cache.entries))
+metrics.gauge_callback(
+    "llm_admission", "Pit Wall LLM calls running and waiting for a slot", lambda: {
+        ("active",): pit_wall.admission.active, ("waiting",): pit_wall.admission.waiting,
+    }, ("state",))
+metrics.counter_callback(
+    "llm_admission_rejected_total", "Pit Wall LLM calls shed by admission control", lambda: pit_wall.admission.rejected)
+metrics.gauge_callback("chat_write_buffered", "Chats waiting in the write-behind buffer", lambda: len(chat_writer.pending))
+
+@timed(mongo_operation_duration, operation="chat_history")
+async def find_chat_history(query: Dict, limit: int) -> List[Dict]:
+    # Served by the (session_id, timestamp, id) index; documents go out as stored, without model re-validation
+    return await db.pit_wall_chats.find(
+        query, CHAT_HISTORY_PROJECTION
+    ).sort([("timestamp", -1), ("id", -1)]).limit(limit).to_list(length=limit)
 
 # API Routes
 @api_router.get("/")
@@ -223,33 +2971,126 @@ async def root():
     return {"message": "HypeRacing F1 Analytics API"}
 
 @api_router.get("/drivers/standings", response_model=List[Dict])
-async def get_driver_standings():
+async def get_driver_standings(request: Request):
     """Get current F1 driver championship standings"""
-    standings = await f1_service.get_current_standings()
-    return standings
+    standings = await f1_store.get_current_standings()
+    return conditional_response(request, standings, STANDINGS_CACHE_CONTROL)
 
 @api_router.get("/races/recent", response_model=List[Dict])
-async def get_recent_races():
-    """Get recent race results"""
-    races = await f1_service.get_recent_races()
-    return races
+async def get_recent_races(
+    request: Request,
+    limit: int = Query(RACES_DEFAULT_LIMIT, ge=1, le=RACES_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    top: Optional[int] = Query(None, ge=1),
+):
+    """Get recent race results, newest first, paginated with the X-Next-Cursor header"""
+    try:
+        before = decode_race_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    unknown = set(field_list or []) - set(RACE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    races = await f1_store.get_recent_races(limit, before, field_list, compact, top)
+    headers = {"X-Next-Cursor": encode_race_cursor(races[-1])} if len(races) == limit else None
+    return conditional_response(request, races, RACES_CACHE_CONTROL, headers)
+
+@api_router.get("/drivers/details")
+async def get_drivers_details(request: Request, ids: str):
+    """Get detailed information for a comma-separated list of drivers in one round trip"""
+    driver_ids = list(dict.fromkeys(driver_id.strip() for driver_id in ids.split(",") if driver_id.strip()))
+    if not driver_ids:
+        raise HTTPException(status_code=400, detail="No driver ids given")
+    if len(driver_ids) > DRIVER_DETAILS_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {DRIVER_DETAILS_MAX_IDS} driver ids per request")
+    details = await f1_store.get_drivers_details(driver_ids)
+    return conditional_response(request, {
+        "drivers": {driver_id: detail for driver_id, detail in details.items() if detail},
+        "not_found": [driver_id for driver_id, detail in details.items() if not detail]
+    }, DRIVER_CACHE_CONTROL)
 
 @api_router.get("/drivers/{driver_id}")
-async def get_driver_details(driver_id: str):
+async def get_driver_details(request: Request, driver_id: str):
     """Get detailed driver information and stats"""
-    details = await f1_service.get_driver_details(driver_id)
+    details = await f1_store.get_driver_details(driver_id)
     if not details:
         raise HTTPException(status_code=404, detail="Driver not found")
-    return details
+    return conditional_response(request, details, DRIVER_CACHE_CONTROL)
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Get upstream response cache hit/miss counters"""
+    return f1_service.cache_stats()
+
+@api_router.get("/store/status")
+async def get_store_status():
+    """Get the seasons and document counts held in the local F1 data store"""
+    return {**await f1_store.status(), "sync": data_sync.stats()}
+
+async def current_analytics() -> SeasonAnalytics:
+    season = await analytics.get()
+    if season is None:
+        raise HTTPException(status_code=503, detail="Analytics are not available yet")
+    return season
+
+@api_router.get("/analytics/drivers")
+async def get_driver_analytics(request: Request):
+    """Season aggregates per driver: points, wins, podiums, average finish and grid, DNF rate"""
+    season = await current_analytics()
+    return conditional_response(request, {"season": season.season, "drivers": season.drivers}, ANALYTICS_CACHE_CONTROL)
+
+@api_router.get("/analytics/constructors")
+async def get_constructor_analytics(request: Request):
+    """Season aggregates per constructor"""
+    season = await current_analytics()
+    return conditional_response(request, {"season": season.season, "constructors": season.constructors},
+                                ANALYTICS_CACHE_CONTROL)
+
+@api_router.get("/analytics/progression")
+async def get_points_progression(request: Request, entity: str = Query("drivers", pattern="^(drivers|constructors)$")):
+    """Cumulative points after each round for every driver or constructor"""
+    season = await current_analytics()
+    return conditional_response(request, {"season": season.season, **season.progression[entity]}, ANALYTICS_CACHE_CONTROL)
+
+@api_router.get("/analytics/head-to-head")
+async def get_teammate_head_to_head(request: Request):
+    """Race finishing head-to-head between teammates"""
+    season = await current_analytics()
+    return conditional_response(request, {"season": season.season, "pairs": season.head_to_head}, ANALYTICS_CACHE_CONTROL)
+
+@api_router.get("/analytics/stats")
+async def get_analytics_stats():
+    """Which data version the precomputed analytics were built from"""
+    return analytics.stats()
+
+@api_router.get("/prefetch/stats")
+async def get_prefetch_stats():
+    """Background prefetch cadence and counters"""
+    return prefetcher.stats()
+
+@api_router.post("/store/ingest")
+async def ingest_seasons(request: IngestRequest, authorization: Optional[str] = Header(None)):
+    """Bulk-load seasons of standings and results into the local F1 data store (admin only)"""
+    if not INGEST_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Ingestion is disabled")
+    if not hmac.compare_digest((authorization or "").encode(), f"Bearer {INGEST_ADMIN_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+    return await f1_store.ingest_seasons(request.seasons)
 
 @api_router.post("/pit-wall/chat")
 async def chat_with_pit_wall(request: PitWallRequest):
     """Chat with the AI Pit Wall for F1 insights"""
-    response = await pit_wall.get_pit_wall_response(
-        request.message, 
-        request.session_id, 
-        request.context
-    )
+    try:
+        response = await pit_wall.get_pit_wall_response(
+            request.message, 
+            request.session_id, 
+            request.context
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=e.reason, headers={"Retry-After": str(e.retry_after)})
     
     # Store chat in database
     chat_message = ChatMessage(
@@ -259,54 +3100,157 @@ async def chat_with_pit_wall(request: PitWallRequest):
         context=request.context
     )
     
-    await db.pit_wall_chats.insert_one(chat_message.dict())
+    chat_writer.add(chat_message.dict())
     
     return {"response": response, "session_id": request.session_id}
 
+@api_router.post("/pit-wall/chat/stream")
+async def stream_chat_with_pit_wall(request: PitWallRequest):
+    """Chat with the AI Pit Wall, streaming the reply as server-sent events"""
+    try:
+        tokens, ticket = await pit_wall.open_pit_wall_stream(request.message, request.session_id, request.context)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=e.reason, headers={"Retry-After": str(e.retry_after)})
+
+    async def events():
+        chunks = []
+        try:
+            async for token in tokens:
+                chunks.append(token)
+                yield f"data: {dumps({'token': token}).decode()}\n\n"
+        except PitWallStreamInterrupted:
+            # A truncated reply is neither stored nor reported as done
+            yield f"event: error\ndata: {dumps({'detail': PIT_WALL_FALLBACK_RESPONSE, 'session_id': request.session_id}).decode()}\n\n"
+            return
+        response = "".join(chunks)
+
+        # Store the completed chat once the stream has finished
+        chat_message = ChatMessage(
+            session_id=request.session_id,
+            message=request.message,
+            response=response,
+            context=request.context
+        )
+        chat_writer.add(chat_message.dict())
+
+        yield f"event: done\ndata: {dumps({'response': response, 'session_id': request.session_id}).decode()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # identity keeps the compression middleware from holding back tokens
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"},
+        # Frees the LLM slot even if the client disconnects before the stream starts
+        background=BackgroundTask(ticket.release) if ticket is not None else None,
+    )
+
+@api_router.get("/pit-wall/cache/stats")
+async def get_pit_wall_cache_stats():
+    """Get Pit Wall response cache hit/miss counters"""
+    return pit_wall.cache.stats()
+
+@api_router.get("/pit-wall/admission/stats")
+async def get_pit_wall_admission_stats():
+    """Get LLM concurrency and queue-depth metrics"""
+    return pit_wall.admission.stats()
+
+@api_router.get("/pit-wall/sessions/stats")
+async def get_pit_wall_session_stats():
+    """Get pooled LLM chat session counters"""
+    sessions = getattr(pit_wall.backend, "sessions", None)
+    return sessions.stats() if sessions is not None else {"sessions": 0}
+
+@api_router.get("/pit-wall/writer/stats")
+async def get_pit_wall_writer_stats():
+    """Get write-behind buffer depth and flush counters for chat persistence"""
+    return chat_writer.stats()
+
 @api_router.get("/pit-wall/history/{session_id}")
-async def get_chat_history(session_id: str, limit: int = 50):
-    """Get chat history for a session"""
-    chats = await db.pit_wall_chats.find(
-        {"session_id": session_id}
-    ).sort("timestamp", -1).limit(limit).to_list(length=limit)
+async def get_chat_history(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=CHAT_HISTORY_MAX_LIMIT),
+    cursor: Optional[str] = None,
+):
+    """Get chat history for a session, newest first, paginated with the X-Next-Cursor header"""
+    try:
+        before = decode_chat_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    query = {"session_id": session_id}
+    if before is not None:
+        # Keyset on (timestamp, id) so chats sharing a millisecond are neither skipped nor repeated
+        timestamp, chat_id = before
+        query["$or"] = [{"timestamp": {"$lt": timestamp}}, {"timestamp": timestamp, "id": {"$lt": chat_id}}]
+    chats = await find_chat_history(query, limit)
     
-    return [ChatMessage(**chat) for chat in chats]
+    # Include chats still waiting in the write-behind buffer
+    pending = [
+        {field: chat.get(field) for field in CHAT_HISTORY_PROJECTION if field != "_id"}
+        for chat in chat_writer.pending_for("session_id", session_id)
+        if before is None or chat_sort_key(chat) < before
+    ]
+    if pending:
+        chats = sorted(pending + chats, key=chat_sort_key, reverse=True)[:limit]
+    
+    headers = None
+    if len(chats) == limit:
+        headers = {"X-Next-Cursor": encode_chat_cursor(chats[-1])}
+    return FastJSONResponse(chats, headers=headers)
 
 # WebSocket for live data
 @api_router.websocket("/ws/live")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
-    try:
+async def websocket_endpoint(websocket: WebSocket, mode: str = "full", encoding: str = "json"):
+    """Stream live timing; mode=delta sends diffs between periodic keyframes, encoding=msgpack sends binary frames"""
+    binary = encoding == "msgpack" and msgpack is not None
+    subscriber = await manager.connect(websocket, delta=mode == "delta", binary=binary)
+    live_broadcaster.start()
+    if live_broadcaster.latest_frame is not None:
+        manager.offer(subscriber, live_broadcaster.latest_frame, keyframe=True)
+
+    async def pump():
         while True:
-            # Simulate live timing data - replace with actual SignalR connection
-            live_data = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "type": "timing_update",
-                "data": {
-                    "race_status": "Race",
-                    "session_time": "1:23:45",
-                    "positions": [
-                        {"pos": 1, "driver": "VER", "gap": "+0.000"},
-                        {"pos": 2, "driver": "LEC", "gap": "+0.234"},
-                        {"pos": 3, "driver": "RUS", "gap": "+1.567"}
-                    ]
-                }
-            }
-            await manager.send_personal_message(json.dumps(live_data), websocket)
-            await asyncio.sleep(2)  # Update every 2 seconds
-            
+            await manager.send_personal_message(await subscriber.queue.get(), websocket)
+
+    sender = asyncio.create_task(pump())
+    try:
+        # Client messages are ignored; receiving only tells us when the socket closes
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
     except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
         manager.disconnect(websocket)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    return FastJSONResponse(
+        {"detail": "F1 data is temporarily unavailable"}, status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request, upstream, LLM, MongoDB and live timing metrics"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+add_compression(app)
+app.add_middleware(StalenessMiddleware)
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # The frontend is served from another origin, so custom response headers must be exposed
+    expose_headers=["X-Next-Cursor", "ETag", "X-Data-Stale", "X-Data-Age"],
 )
 
 # Configure logging
@@ -316,10 +3260,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Keep references to fire-and-forget tasks so they are not garbage collected
+background_tasks = set()
+
 @app.on_event("startup")
 async def startup_event():
+    if backplane is not None:
+        await backplane.start()
+        await leader.start()
+    await f1_service.start()
+    await f1_service.cache.ensure_indexes()
+    await f1_store.ensure_indexes()
+    await data_sync.start()
+    await ensure_chat_indexes()
+    invalid = [season for season in F1_STORE_SEASONS if not re.match(SEASON_PATTERN, season)]
+    if invalid:
+        logger.error(f"Ignoring invalid F1_STORE_SEASONS entries: {invalid}")
+    seasons = [season for season in F1_STORE_SEASONS if season not in invalid]
+    # The store only answers the current routes once it holds the current season
+    if seasons and "current" not in seasons:
+        seasons.insert(0, "current")
+    if seasons:
+        task = asyncio.create_task(f1_store.ingest_seasons(seasons))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    live_broadcaster.start()
+    chat_writer.start()
+    if PREFETCH_ENABLED:
+        prefetcher.start()
     logger.info("HypeRacing F1 Analytics API started")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await live_broadcaster.stop()
+    await prefetcher.stop()
+    await data_sync.stop()
+    await leader.stop()
+    await chat_writer.stop()
+    await f1_service.close()
+    if backplane is not None:
+        await backplane.close()
+    client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Equivalent to `uvicorn server:app`, with permessage-deflate for /api/ws/live made explicit
+    uvicorn.run(
+        "server:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8001")),
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        ws_per_message_deflate=LIVE_WS_DEFLATE,
+    )
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+HypeRacing F1 Analytics Backend Benchmark
+Boots the API in-process against a fake Ergast upstream, fake LLM and mongomock (or a local
+MongoDB), drives concurrent load on every route and the live WebSocket, and reports throughput
+and latency percentiles, optionally against a saved baseline
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+FAKE_ERGAST_URL = "http://ergast.benchmark/f1"
+SEASON = "2025"
+
+TEAMS = [
+    ("red_bull", "Red Bull"), ("ferrari", "Ferrari"), ("mclaren", "McLaren"), ("mercedes", "Mercedes"),
+    ("aston_martin", "Aston Martin"), ("alpine", "Alpine F1 Team"), ("rb", "RB F1 Team"),
+    ("haas", "Haas F1 Team"), ("williams", "Williams"), ("sauber", "Sauber"),
+]
+DRIVERS = [
+    ("max_verstappen", "VER", "Max", "Verstappen", "Dutch", 0), ("tsunoda", "TSU", "Yuki", "Tsunoda", "Japanese", 0),
+    ("leclerc", "LEC", "Charles", "Leclerc", "Monegasque", 1), ("hamilton", "HAM", "Lewis", "Hamilton", "British", 1),
+    ("norris", "NOR", "Lando", "Norris", "British", 2), ("piastri", "PIA", "Oscar", "Piastri", "Australian", 2),
+    ("russell", "RUS", "George", "Russell", "British", 3), ("antonelli", "ANT", "Andrea Kimi", "Antonelli", "Italian", 3),
+    ("alonso", "ALO", "Fernando", "Alonso", "Spanish", 4), ("stroll", "STR", "Lance", "Stroll", "Canadian", 4),
+    ("gasly", "GAS", "Pierre", "Gasly", "French", 5), ("doohan", "DOO", "Jack", "Doohan", "Australian", 5),
+    ("hadjar", "HAD", "Isack", "Hadjar", "French", 6), ("lawson", "LAW", "Liam", "Lawson", "New Zealander", 6),
+    ("bearman", "BEA", "Oliver", "Bearman", "British", 7), ("ocon", "OCO", "Esteban", "Ocon", "French", 7),
+    ("albon", "ALB", "Alexander", "Albon", "Thai", 8), ("sainz", "SAI", "Carlos", "Sainz", "Spanish", 8),
+    ("hulkenberg", "HUL", "Nico", "Hulkenberg", "German", 9), ("bortoleto", "BOR", "Gabriel", "Bortoleto", "Brazilian", 9),
+]
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+QUESTIONS = [
+    "Who is leading the championship?",
+    "What tyre strategy would you pick for the next race?",
+    "How did the McLaren drivers compare last weekend?",
+    "Explain undercut versus overcut.",
+    "Who has the best average finish this season?",
+]
+
+# Fake Ergast upstream
+def driver_json(driver):
+    driver_id, code, given, family, nationality, _ = driver
+    return {"driverId": driver_id, "code": code, "givenName": given, "familyName": family, "nationality": nationality,
+            "permanentNumber": str(DRIVERS.index(driver) + 1)}
+
+def constructor_json(team_index):
+    constructor_id, name = TEAMS[team_index]
+    return {"constructorId": constructor_id, "name": name, "nationality": ""}
+
+def build_season(rounds, seed=2025):
+    """A deterministic season of races with full results and a few retirements"""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(days=14 * rounds)
+    races = []
+    for round_number in range(1, rounds + 1):
+        order = sorted(DRIVERS, key=lambda driver: rng.gauss(DRIVERS.index(driver), 6))
+        grid = rng.sample(range(1, len(DRIVERS) + 1), len(DRIVERS))
+        results = []
+        for place, driver in enumerate(order, start=1):
+            retired = place > 15 and rng.random() < 0.4
+            results.append({
+                "number": str(DRIVERS.index(driver) + 1),
+                "position": str(place),
+                "positionText": "R" if retired else str(place),
+                "points": str(POINTS[place - 1] if place <= len(POINTS) else 0),
+                "Driver": driver_json(driver),
+                "Constructor": constructor_json(driver[5]),
+                "grid": str(grid[place - 1]),
+                "laps": str(57 - (rng.randint(5, 40) if retired else 0)),
+                "status": "Accident" if retired else "Finished",
+            })
+        race_date = start + timedelta(days=14 * (round_number - 1))
+        races.append({
+            "season": SEASON,
+            "round": str(round_number),
+            "url": f"https://example.com/{SEASON}/{round_number}",
+            "raceName": f"Grand Prix {round_number}",
+            "Circuit": {"circuitId": f"circuit_{round_number}", "circuitName": f"Circuit {round_number}"},
+            "date": race_date.strftime("%Y-%m-%d"),
+            "time": "14:00:00Z",
+            "Results": results,
+        })
+    return races
+
+class FakeErgast:
+    """Answers the Ergast paths the backend uses from a generated season"""
+
+    def __init__(self, rounds, latency=0.0):
+        self.races = build_season(rounds)
+        self.latency = latency
+        self.requests = 0
+
+    async def __call__(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = request.url.path.removeprefix(httpx.URL(FAKE_ERGAST_URL).path)
+        payload = self.payload(path, request.url.params)
+        if payload is None:
+            return httpx.Response(404, json={"detail": "Not found"})
+        return httpx.Response(200, json=payload)
+
+    def payload(self, path, params):
+        parts = path.strip("/").removesuffix(".json").split("/")
+        if parts[0] not in ("current", SEASON):
+            return None
+        limit = int(params.get("limit", 30))
+        offset = int(params.get("offset", 0))
+        if parts[1:] == []:
+            return self.race_table([{key: value for key, value in race.items() if key != "Results"} for race in self.races])
+        if parts[1:] == ["driverStandings"]:
+            return self.standings()
+        if parts[1:] == ["results"]:
+            return self.results(self.races, limit, offset)
+        if parts[1:] == ["last", "results"]:
+            return self.results(self.races[-1:], limit, offset)
+        if parts[1:] == ["drivers"]:
+            drivers = [driver_json(driver) for driver in DRIVERS]
+            return {"MRData": {"total": str(len(drivers)), "DriverTable": {"Drivers": drivers[offset:offset + limit]}}}
+        if len(parts) >= 3 and parts[1] == "drivers":
+            driver = next((driver for driver in DRIVERS if driver[0] == parts[2]), None)
+            if parts[3:] == ["results"]:
+                races = [
+                    {**race, "Results": [result for result in race["Results"] if result["Driver"]["driverId"] == parts[2]]}
+                    for race in self.races
+                ] if driver else []
+                return self.results(races, limit, offset)
+            if parts[3:] == []:
+                return {"MRData": {"total": "1" if driver else "0",
+                                   "DriverTable": {"Drivers": [driver_json(driver)] if driver else []}}}
+        return None
+
+    def race_table(self, races, total=None):
+        return {"MRData": {"total": str(len(races) if total is None else total), "RaceTable": {"Races": races}}}
+
+    def results(self, races, limit, offset):
+        """Page through result rows the way Ergast does, regrouping them under their races"""
+        rows = [(race, result) for race in races for result in race["Results"]]
+        page = {}
+        for race, result in rows[offset:offset + limit]:
+            page.setdefault(race["round"], {**race, "Results": []})["Results"].append(result)
+        return self.race_table(list(page.values()), total=len(rows))
+
+    def standings(self):
+        totals = Counter()
+        wins = Counter()
+        for race in self.races:
+            for result in race["Results"]:
+                totals[result["Driver"]["driverId"]] += float(result["points"])
+                wins[result["Driver"]["driverId"]] += result["position"] == "1"
+        ordered = sorted(DRIVERS, key=lambda driver: -totals[driver[0]])
+        return {"MRData": {"StandingsTable": {"StandingsLists": [{
+            "season": SEASON,
+            "round": str(len(self.races)),
+            "DriverStandings": [
+                {"position": str(position), "points": f"{totals[driver[0]]:g}", "wins": str(wins[driver[0]]),
+                 "Driver": driver_json(driver), "Constructors": [constructor_json(driver[5])]}
+                for position, driver in enumerate(ordered, start=1)
+            ],
+        }]}}}
+
+# In-process server
+def load_server(args, upstream):
+    """Import server.py wired to the fake upstream, fake LLM and the chosen MongoDB"""
+    os.environ["ERGAST_BASE_URL"] = FAKE_ERGAST_URL
+    os.environ["PIT_WALL_LLM_BACKEND"] = "fake"
+    os.environ["MONGO_URL"] = "mongodb://localhost:27017" if args.mongo == "mongomock" else args.mongo
+    os.environ.setdefault("DB_NAME", "hyperacing_benchmark")
+    # Background refreshes would compete with the measured requests
+    os.environ.setdefault("PREFETCH_ENABLED", "false")
+    # Every benchmark client shares one address and would be throttled as a single abusive client
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("LIVE_INTERVAL", str(args.live_interval))
+    os.environ.setdefault("INGEST_ADMIN_TOKEN", "benchmark")
+    if args.mongo == "mongomock":
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    # server.py logs every upstream and API request at INFO, which would drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server.f1_service.transport = httpx.MockTransport(upstream)
+    return server
+
+async def start_uvicorn(app, port):
+    import uvicorn
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+    uvicorn_server = uvicorn.Server(config)
+    task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    bound_port = uvicorn_server.servers[0].sockets[0].getsockname()[1]
+    return uvicorn_server, task, bound_port
+
+# Scenarios
+def http_scenarios(session_ids):
+    """Every HTTP route as (name, request factory); factories take an RNG and return (method, path, kwargs)"""
+    driver_ids = [driver[0] for driver in DRIVERS]
+
+    def get(path):
+        return lambda rng: ("GET", path, {})
+
+    def chat(path):
+        return lambda rng: ("POST", path, {"json": {"message": rng.choice(QUESTIONS), "session_id": rng.choice(session_ids)}})
+
+    return [
+        ("root", get("/api/")),
+        ("standings", get("/api/drivers/standings")),
+        ("races_recent", get("/api/races/recent?limit=10")),
+        ("races_compact", get("/api/races/recent?limit=10&compact=true&top=3")),
+        ("driver_details", lambda rng: ("GET", f"/api/drivers/{rng.choice(driver_ids)}", {})),
+        ("drivers_bulk", lambda rng: ("GET", "/api/drivers/details", {"params": {"ids": ",".join(rng.sample(driver_ids, 5))}})),
+        ("analytics_drivers", get("/api/analytics/drivers")),
+        ("analytics_constructors", get("/api/analytics/constructors")),
+        ("analytics_progression", get("/api/analytics/progression")),
+        ("analytics_head_to_head", get("/api/analytics/head-to-head")),
+        ("pit_wall_chat", chat("/api/pit-wall/chat")),
+        ("pit_wall_stream", chat("/api/pit-wall/chat/stream")),
+        ("chat_history", lambda rng: ("GET", f"/api/pit-wall/history/{rng.choice(session_ids)}", {})),
+        ("cache_stats", get("/api/cache/stats")),
+        ("store_status", get("/api/store/status")),
+        ("prefetch_stats", get("/api/prefetch/stats")),
+        ("analytics_stats", get("/api/analytics/stats")),
+        ("pit_wall_cache_stats", get("/api/pit-wall/cache/stats")),
+        ("pit_wall_admission_stats", get("/api/pit-wall/admission/stats")),
+        ("pit_wall_sessions_stats", get("/api/pit-wall/sessions/stats")),
+        ("pit_wall_writer_stats", get("/api/pit-wall/writer/stats")),
+        ("metrics", get("/metrics")),
+        ("store_ingest", lambda rng: (
+            "POST", "/api/store/ingest",
+            {"json": {"seasons": ["current"]}, "headers": {"Authorization": f"Bearer {os.environ['INGEST_ADMIN_TOKEN']}"}},
+        )),
+    ]
+
+# Load 429 from admission control is the system working as designed, so it is reported but not an error
+EXPECTED_STATUSES = {200, 304, 429}
+
+def percentiles(samples):
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "mean": None}
+    values = np.array(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2), "p99": round(float(p99), 2),
+            "max": round(float(values.max()), 2), "mean": round(float(values.mean()), 2)}
+
+async def run_http_scenario(client, build, concurrency, duration):
+    latencies = []
+    first_bytes = []
+    statuses = Counter()
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            method, path, kwargs = build(rng)
+            started = time.perf_counter()
+            first_byte = None
+            try:
+                async with client.stream(method, path, **kwargs) as response:
+                    async for _ in response.aiter_raw():
+                        if first_byte is None:
+                            first_byte = time.perf_counter() - started
+                statuses[response.status_code] += 1
+                if response.status_code not in EXPECTED_STATUSES:
+                    errors += 1
+            except httpx.HTTPError:
+                statuses["exception"] += 1
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            first_bytes.append(first_byte if first_byte is not None else latencies[-1])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": sum(statuses.values()),
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": percentiles(latencies),
+        "ttfb_ms": percentiles(first_bytes),
+    }
+
+async def run_websocket_scenario(url, clients, duration, interval):
+    """Hold many live subscribers open and measure connect time, delivery and frame jitter"""
+    import websockets
+
+    connects = []
+    gaps = []
+    frames = Counter()
+    errors = 0
+
+    async def subscriber(index):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(url, max_size=None) as websocket:
+                connects.append(time.perf_counter() - started)
+                deadline = time.perf_counter() + duration
+                last = None
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(websocket.recv(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    now = time.perf_counter()
+                    if last is not None:
+                        gaps.append(abs(now - last - interval))
+                    last = now
+                    frames[index] += 1
+        except Exception:
+            errors += 1
+
+    await asyncio.gather(*(subscriber(index) for index in range(clients)))
+    expected = clients * duration / interval
+    return {
+        "clients": clients,
+        "errors": errors,
+        "frames": sum(frames.values()),
+        "throughput_fps": round(sum(frames.values()) / duration, 1),
+        "delivery_ratio": round(sum(frames.values()) / expected, 3) if expected else None,
+        "connect_ms": percentiles(connects),
+        "jitter_ms": percentiles(gaps),
+    }
+
+# Reporting
+def print_http_result(name, result, baseline=None):
+    latency = result["latency_ms"]
+    line = (f"{name:<26} {result['throughput_rps']:>9.1f} {latency['p50'] or 0:>8.2f} {latency['p95'] or 0:>8.2f} "
+            f"{latency['p99'] or 0:>8.2f} {result['errors']:>6}")
+    if baseline:
+        line += f"   rps {change(result['throughput_rps'], baseline['throughput_rps'])}"
+        line += f"  p95 {change(latency['p95'], baseline['latency_ms']['p95'])}"
+    print(line)
+
+def print_websocket_result(name, result, baseline=None):
+    line = (f"{name:<26} {result['throughput_fps']:>7.1f} fps  delivery {result['delivery_ratio']}  "
+            f"connect p95 {result['connect_ms']['p95']} ms  jitter p95 {result['jitter_ms']['p95']} ms  errors {result['errors']}")
+    if baseline:
+        line += f"   fps {change(result['throughput_fps'], baseline['throughput_fps'])}"
+    print(line)
+
+def change(current, previous):
+    if not previous or current is None:
+        return "   n/a"
+    return f"{(current - previous) / previous:+6.1%}"
+
+def find_regressions(results, baseline, tolerance):
+    """Scenarios whose throughput fell or tail latency rose by more than the tolerance"""
+    regressions = []
+    for name, result in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if "throughput_rps" in result:
+            checks = [("throughput_rps", result["throughput_rps"], previous["throughput_rps"], True),
+                      ("p95", result["latency_ms"]["p95"], previous["latency_ms"]["p95"], False),
+                      ("p99", result["latency_ms"]["p99"], previous["latency_ms"]["p99"], False)]
+        else:
+            checks = [("throughput_fps", result["throughput_fps"], previous["throughput_fps"], True)]
+        for metric, current, before, higher_is_better in checks:
+            if not before or current is None:
+                continue
+            delta = (current - before) / before
+            if (higher_is_better and delta < -tolerance) or (not higher_is_better and delta > tolerance):
+                regressions.append(f"{name} {metric}: {before} -> {current} ({delta:+.1%})")
+    return regressions
+
+async def run_benchmark(args):
+    upstream = FakeErgast(args.rounds, args.upstream_latency)
+    server = load_server(args, upstream)
+    uvicorn_server, serve_task, port = await start_uvicorn(server.app, args.port)
+    base_url = f"http://127.0.0.1:{port}"
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    selected = set(args.scenarios.split(",")) if args.scenarios else None
+    session_ids = [f"benchmark-{index}" for index in range(args.sessions)]
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "scenarios": {},
+    }
+
+    print("🏁 HypeRacing F1 Analytics Backend Benchmark")
+    print(f"Server: {base_url} | concurrency {args.concurrency} | {args.duration}s per scenario | mongo {args.mongo}")
+    print("=" * 96)
+    print(f"{'scenario':<26} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            for name, build in http_scenarios(session_ids):
+                if selected and name not in selected:
+                    continue
+                if args.warmup:
+                    await run_http_scenario(client, build, args.concurrency, args.warmup)
+                result = await run_http_scenario(client, build, args.concurrency, args.duration)
+                results["scenarios"][name] = result
+                print_http_result(name, result, (baseline or {}).get("scenarios", {}).get(name))
+
+        ws_modes = [("ws_live_full", "")]
+        if server.msgpack is not None:
+            ws_modes.append(("ws_live_delta_msgpack", "?mode=delta&encoding=msgpack"))
+        for name, query in ws_modes:
+            if selected and name not in selected:
+                continue
+            result = await run_websocket_scenario(f"ws://127.0.0.1:{port}/api/ws/live{query}", args.ws_clients,
+                                                  args.duration, server.LIVE_INTERVAL)
+            results["scenarios"][name] = result
+            print_websocket_result(name, result, (baseline or {}).get("scenarios", {}).get(name))
+    finally:
+        uvicorn_server.should_exit = True
+        await serve_task
+
+    results["upstream_requests"] = upstream.requests
+    print("=" * 96)
+    print(f"Upstream requests served by the fake Ergast: {upstream.requests}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+    regressions = find_regressions(results, baseline, args.tolerance) if baseline else []
+    if regressions:
+        print(f"⚠️  {len(regressions)} regressions beyond {args.tolerance:.0%} of {args.baseline}:")
+        for regression in regressions:
+            print(f"   {regression}")
+    elif baseline:
+        print(f"🎉 No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return not regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5, help="seconds of measured load per scenario")
+    parser.add_argument("--warmup", type=float, default=1, help="seconds of unmeasured load before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent HTTP clients")
+    parser.add_argument("--ws-clients", type=int, default=50, help="concurrent live WebSocket subscribers")
+    parser.add_argument("--sessions", type=int, default=20, help="distinct Pit Wall session ids")
+    parser.add_argument("--scenarios", default="", help="comma-separated scenario names to run (default: all)")
+    parser.add_argument("--rounds", type=int, default=12, help="races in the fake season")
+    parser.add_argument("--upstream-latency", type=float, default=0.0, help="seconds added to every fake Ergast response")
+    parser.add_argument("--live-interval", type=float, default=0.1, help="live timing frame interval in seconds")
+    parser.add_argument("--mongo", default="mongomock", help='"mongomock" or a MongoDB URL')
+    parser.add_argument("--port", type=int, default=0, help="port for the in-process server (default: any free port)")
+    parser.add_argument("--output", help="write results as JSON to this path (use it to record a baseline)")
+    parser.add_argument("--baseline", help="compare against results previously written with --output")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative change treated as a regression")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    success = asyncio.run(run_benchmark(parse_args()))
+    sys.exit(0 if success else 1)
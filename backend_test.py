@@ -171,6 +171,29 @@ class F1BackendTester:
         self.log_test("Driver Details", False, "No valid drivers found")
         return False
     
+    async def test_bulk_driver_details(self):
+        """Test 4b: Bulk Driver Details"""
+        try:
+            params = {"ids": "verstappen,leclerc,invalid-driver-123"}
+            async with self.session.get(f"{API_BASE}/drivers/details", params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if "drivers" in data and "invalid-driver-123" in data.get("not_found", []):
+                        self.log_test("Bulk Driver Details", True, 
+                                    f"Retrieved {len(data['drivers'])} drivers", 
+                                    {"drivers": list(data["drivers"]), "not_found": data["not_found"]})
+                        return True
+                    else:
+                        self.log_test("Bulk Driver Details", False, 
+                                    f"Missing required fields in response")
+                        return False
+                else:
+                    self.log_test("Bulk Driver Details", False, f"Status: {response.status}")
+                    return False
+        except Exception as e:
+            self.log_test("Bulk Driver Details", False, f"Exception: {str(e)}")
+            return False
+    
     async def test_pit_wall_chat(self):
         """Test 5: AI Pit Wall Chat"""
         try:
@@ -233,6 +256,34 @@ class F1BackendTester:
             self.log_test("Pit Wall Session Continuity", False, f"Exception: {str(e)}")
             return False
     
+    async def test_pit_wall_chat_stream(self):
+        """Test 6b: Streaming Pit Wall Chat"""
+        try:
+            chat_payload = {
+                "message": "Which team has the best race pace?",
+                "session_id": self.session_id
+            }
+            
+            async with self.session.post(f"{API_BASE}/pit-wall/chat/stream", 
+                                       json=chat_payload) as response:
+                if response.status == 200:
+                    body = await response.text()
+                    token_events = body.count("data: {\"token\"")
+                    if token_events > 0 and "event: done" in body:
+                        self.log_test("Pit Wall Chat Stream", True, 
+                                    f"Received {token_events} token events before done")
+                        return True
+                    else:
+                        self.log_test("Pit Wall Chat Stream", False, 
+                                    f"Missing token or done events in stream")
+                        return False
+                else:
+                    self.log_test("Pit Wall Chat Stream", False, f"Status: {response.status}")
+                    return False
+        except Exception as e:
+            self.log_test("Pit Wall Chat Stream", False, f"Exception: {str(e)}")
+            return False
+    
     async def test_chat_history(self):
         """Test 7: Chat History Retrieval"""
         try:
@@ -255,8 +306,78 @@ class F1BackendTester:
             self.log_test("Chat History", False, f"Exception: {str(e)}")
             return False
     
+    async def test_cache_stats(self):
+        """Test 8: Upstream Cache Stats"""
+        try:
+            # Warm the cache so the standings lookup is served from memory
+            async with self.session.get(f"{API_BASE}/drivers/standings") as response:
+                await response.read()
+            async with self.session.get(f"{API_BASE}/cache/stats") as response:
+                if response.status == 200:
+                    data = await response.json()
+                    required_fields = ['entries', 'hits', 'stale_hits', 'misses', 'hit_ratio']
+                    if all(field in data for field in required_fields) and data["entries"] > 0:
+                        self.log_test("Cache Stats", True, 
+                                    f"Hits: {data['hits']}, misses: {data['misses']}", data)
+                        return True
+                    else:
+                        self.log_test("Cache Stats", False, 
+                                    f"Missing counters or empty cache", data)
+                        return False
+                else:
+                    self.log_test("Cache Stats", False, f"Status: {response.status}")
+                    return False
+        except Exception as e:
+            self.log_test("Cache Stats", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_store_status(self):
+        """Test 8b: Local Data Store Status"""
+        try:
+            async with self.session.get(f"{API_BASE}/store/status") as response:
+                if response.status == 200:
+                    data = await response.json()
+                    required_fields = ['seasons', 'races', 'standings', 'drivers']
+                    if all(field in data for field in required_fields):
+                        self.log_test("Data Store Status", True, 
+                                    f"Seasons ingested: {data['seasons']}", data)
+                        return True
+                    else:
+                        self.log_test("Data Store Status", False, 
+                                    f"Missing required fields in response", data)
+                        return False
+                else:
+                    self.log_test("Data Store Status", False, f"Status: {response.status}")
+                    return False
+        except Exception as e:
+            self.log_test("Data Store Status", False, f"Exception: {str(e)}")
+            return False
+    
+    async def test_driver_analytics(self):
+        """Test 8c: Precomputed Driver Analytics"""
+        try:
+            async with self.session.get(f"{API_BASE}/analytics/drivers") as response:
+                if response.status == 200:
+                    data = await response.json()
+                    drivers = data.get('drivers', [])
+                    required_fields = ['driver_id', 'points', 'avg_finish', 'dnf_rate']
+                    if drivers and all(field in drivers[0] for field in required_fields):
+                        self.log_test("Driver Analytics", True, 
+                                    f"Season {data['season']}: {len(drivers)} drivers", drivers[0])
+                        return True
+                    else:
+                        self.log_test("Driver Analytics", False, 
+                                    f"Missing drivers or required fields in response", data)
+                        return False
+                else:
+                    self.log_test("Driver Analytics", False, f"Status: {response.status}")
+                    return False
+        except Exception as e:
+            self.log_test("Driver Analytics", False, f"Exception: {str(e)}")
+            return False
+    
     async def test_error_handling(self):
-        """Test 8: Error Handling"""
+        """Test 9: Error Handling"""
         error_tests = [
             ("Invalid Endpoint", f"{API_BASE}/invalid-endpoint", 404),
             ("Invalid Driver ID", f"{API_BASE}/drivers/invalid-driver-123", 404),
@@ -307,9 +428,14 @@ class F1BackendTester:
             self.test_driver_standings,
             self.test_recent_races,
             self.test_driver_details,
+            self.test_bulk_driver_details,
             self.test_pit_wall_chat,
             self.test_pit_wall_session_continuity,
+            self.test_pit_wall_chat_stream,
             self.test_chat_history,
+            self.test_cache_stats,
+            self.test_store_status,
+            self.test_driver_analytics,
             self.test_error_handling,
         ]
         
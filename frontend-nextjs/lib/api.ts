@@ -25,9 +25,17 @@ export const apiService = {
     return response.data;
   },
 
-  // Recent races
-  async getRecentRaces(): Promise<any[]> {
-    const response = await api.get('/api/races/recent');
+  // Recent races (pass the returned nextCursor back as cursor for the next page)
+  async getRecentRaces(
+    params: { limit?: number; cursor?: string; fields?: string; compact?: boolean; top?: number } = {}
+  ): Promise<{ races: any[]; nextCursor?: string }> {
+    const response = await api.get('/api/races/recent', { params });
+    return { races: response.data, nextCursor: response.headers['x-next-cursor'] };
+  },
+
+  // Driver details for several drivers in one round trip
+  async getDriversDetails(driverIds: string[]): Promise<{ drivers: Record<string, any>; not_found: string[] }> {
+    const response = await api.get('/api/drivers/details', { params: { ids: driverIds.join(',') } });
     return response.data;
   },
 
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+
+def test_slots_are_granted_until_full_then_queued(server):
+    async def scenario():
+        controller = server.LlmAdmissionController(max_concurrency=2, max_queue_depth=4)
+        first = await controller.acquire("a")
+        await controller.acquire("b")
+        waiter = asyncio.create_task(controller.acquire("c"))
+        await asyncio.sleep(0)
+        queued = (controller.active, controller.waiting, waiter.done())
+        first.release()
+        first.release()
+        await waiter
+        return queued, controller.stats()
+
+    queued, stats = asyncio.run(scenario())
+    assert queued == (2, 1, False)
+    # Releasing a ticket twice hands over only one slot
+    assert stats["active"] == 2
+    assert stats["waiting"] == 0
+    assert stats["admitted"] == 3
+
+
+def test_waiting_sessions_are_served_round_robin(server):
+    async def scenario():
+        controller = server.LlmAdmissionController(max_concurrency=1, max_queue_depth=8, max_queued_per_session=3)
+        ticket = await controller.acquire("holder")
+        order = []
+
+        async def ask(session_id):
+            admitted = await controller.acquire(session_id)
+            order.append(session_id)
+            admitted.release()
+
+        tasks = [asyncio.create_task(ask(session_id)) for session_id in ("chatty", "chatty", "chatty", "quiet")]
+        await asyncio.sleep(0)
+        ticket.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["chatty", "quiet", "chatty", "chatty"]
+
+
+def test_callers_are_shed_when_the_queue_is_full(server):
+    async def scenario():
+        controller = server.LlmAdmissionController(max_concurrency=1, max_queue_depth=2, max_queued_per_session=1)
+        await controller.acquire("holder")
+        waiters = [asyncio.create_task(controller.acquire(session_id)) for session_id in ("a", "b")]
+        await asyncio.sleep(0)
+        with pytest.raises(server.AdmissionRejected, match="capacity"):
+            await controller.acquire("c")
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        pending = asyncio.create_task(controller.acquire("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(server.AdmissionRejected, match="this session"):
+            await controller.acquire("a")
+        pending.cancel()
+        await asyncio.gather(pending, return_exceptions=True)
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 2
+    assert stats["waiting"] == 0
+
+
+def test_waiters_time_out(server):
+    async def scenario():
+        controller = server.LlmAdmissionController(max_concurrency=1, queue_timeout=0.01)
+        await controller.acquire("holder")
+        with pytest.raises(server.AdmissionRejected, match="Timed out"):
+            await controller.acquire("late")
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["timed_out"] == 1
+    assert stats["waiting"] == 0
+
+
+def test_a_slot_handed_over_as_the_wait_times_out_is_returned(server, monkeypatch):
+    async def scenario():
+        controller = server.LlmAdmissionController(max_concurrency=1)
+        holder = await controller.acquire("holder")
+
+        async def handover_then_timeout(future, timeout):
+            # The holder finishes at the same moment the waiter's timeout fires
+            holder.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(server.asyncio, "wait_for", handover_then_timeout)
+        with pytest.raises(server.AdmissionRejected, match="Timed out"):
+            await controller.acquire("late")
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0
+    assert stats["waiting"] == 0
+    assert stats["timed_out"] == 1
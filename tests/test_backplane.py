@@ -0,0 +1,148 @@
+import asyncio
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+from .conftest import ERGAST_TEST_URL
+
+
+class ScriptedSource:
+    """Live timing source that yields a fixed list of snapshots and counts how often it is read"""
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.reads = 0
+
+    async def stream(self):
+        self.reads += 1
+        for snapshot in self.snapshots:
+            # Gives every worker's relay time to subscribe before the first frame
+            await asyncio.sleep(0.01)
+            yield snapshot
+
+
+def subscribe(server, connections):
+    subscriber = server.LiveSubscriber(None, queue_size=10, delta=False, binary=False)
+    connections.active_connections[object()] = subscriber
+    return subscriber
+
+
+def drain(subscriber):
+    frames = []
+    while not subscriber.queue.empty():
+        frames.append(subscriber.queue.get_nowait())
+    return frames
+
+
+def test_one_worker_leads_until_it_stops(server):
+    async def scenario():
+        backplane = server.LocalBackplane()
+        first = server.LeaderElection(backplane, ttl=5)
+        second = server.LeaderElection(backplane, ttl=5)
+        await first.start()
+        await second.start()
+        both = (first.is_leader, second.is_leader)
+        await first.stop()
+        await second.campaign()
+        after_stop = (first.is_leader, second.is_leader)
+        await second.stop()
+        return both, after_stop
+
+    both, after_stop = asyncio.run(scenario())
+    assert both == (True, False)
+    assert after_stop == (False, True)
+
+
+def test_a_lapsed_lease_is_taken_over(server):
+    async def scenario():
+        backplane = server.LocalBackplane()
+        crashed = server.LeaderElection(backplane, ttl=0.05)
+        standby = server.LeaderElection(backplane, ttl=0.05)
+        # A leader that dies never renews or releases its lease
+        await crashed.campaign()
+        await standby.campaign()
+        held = standby.is_leader
+        await asyncio.sleep(0.06)
+        await standby.campaign()
+        return crashed.is_leader, held, standby.is_leader
+
+    assert asyncio.run(scenario()) == (True, False, True)
+
+
+def test_frames_are_produced_once_and_relayed_by_every_worker(server):
+    async def scenario():
+        backplane = server.LocalBackplane()
+        source = ScriptedSource([{"lap": 1}, {"lap": 2}])
+        workers = []
+        for _ in range(2):
+            election = server.LeaderElection(backplane, ttl=5)
+            await election.start()
+            connections = server.ConnectionManager()
+            subscriber = subscribe(server, connections)
+            broadcaster = server.LiveTimingBroadcaster(connections, source, interval=0.01,
+                                                       backplane=backplane, leader=election)
+            workers.append((election, broadcaster, subscriber))
+        for election, broadcaster, subscriber in workers:
+            broadcaster.start()
+        await asyncio.sleep(0.1)
+        for election, broadcaster, subscriber in workers:
+            await broadcaster.stop()
+            await election.stop()
+        return source.reads, [[server.orjson.loads(frame)["data"] for frame in drain(subscriber)]
+                              for election, broadcaster, subscriber in workers]
+
+    reads, received = asyncio.run(scenario())
+    assert reads == 1
+    assert received == [[{"lap": 1}, {"lap": 2}], [{"lap": 1}, {"lap": 2}]]
+
+
+def test_followers_adopt_the_data_version_and_current_season(server, ergast):
+    async def scenario():
+        backplane = server.LocalBackplane()
+        service = server.F1DataService(base_url=ERGAST_TEST_URL, transport=httpx.MockTransport(ergast))
+        await service.start()
+        workers = []
+        for worker_id in ("leader", "follower"):
+            version = server.DataVersion()
+            store = server.F1DataStore(AsyncMongoMockClient()[f"hyperacing_{worker_id}"], service)
+            workers.append((version, store, server.DataSync(backplane, version, store, worker_id)))
+        (leader_version, leader_store, leader_sync), (version, store, sync) = workers
+        try:
+            await sync.start()
+            await asyncio.sleep(0)
+            await leader_store.ingest_season("current")
+            leader_version.observe({"standings": ["verstappen", "norris"]})
+            await asyncio.sleep(0.01)
+
+            # A worker starting later catches up from the stored state
+            late_version = server.DataVersion()
+            late_store = server.F1DataStore(AsyncMongoMockClient()["hyperacing_late"], service)
+            late_sync = server.DataSync(backplane, late_version, late_store, "late")
+            await late_sync.start()
+            await late_sync.stop()
+            return (leader_version.value, (version.value, store.current_season, store.seasons),
+                    (late_version.value, late_store.current_season), sync.stats())
+        finally:
+            await sync.stop()
+            await service.close()
+
+    leader_version, follower, late, stats = asyncio.run(scenario())
+    assert leader_version
+    assert follower == (leader_version, 2024, [2024])
+    assert late == (leader_version, 2024)
+    assert stats["applied"] == 2
+
+
+def test_shared_cache_serves_what_another_worker_fetched(server):
+    async def scenario():
+        backplane = server.LocalBackplane()
+        fetched, other = (server.ResponseCache(backplane=backplane) for _ in range(2))
+        await fetched.set("/current.json", {"MRData": {"round": "3"}})
+        entry = await other.get("/current.json")
+        again = await other.get("/current.json")
+        return entry.value, again.value, other.l2_hits
+
+    value, again, l2_hits = asyncio.run(scenario())
+    assert value == again == {"MRData": {"round": "3"}}
+    # The second read is served from the worker's own tier
+    assert l2_hits == 1
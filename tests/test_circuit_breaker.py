@@ -0,0 +1,117 @@
+import asyncio
+
+import httpx
+import pytest
+
+from .conftest import ERGAST_TEST_URL
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(server, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(server, clock):
+    breaker = server.CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(server.CircuitOpen) as raised:
+        breaker.check()
+    assert raised.value.retry_after == 30
+    assert breaker.stats() == {"state": "open", "consecutive_failures": 3, "times_opened": 1, "rejected": 1}
+
+
+def test_half_open_lets_a_single_probe_through(server, clock):
+    breaker = server.CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.check()
+    with pytest.raises(server.CircuitOpen):
+        breaker.check()
+    assert breaker.state == "half_open"
+
+    # A failed probe reopens for another full period
+    breaker.record_failure()
+    clock.now += 29
+    with pytest.raises(server.CircuitOpen):
+        breaker.check()
+    clock.now += 1
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.check()
+
+
+def test_abandoned_probe_frees_the_half_open_slot(server, clock):
+    breaker = server.CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.check()
+    breaker.abandon_probe()
+    breaker.check()
+    assert breaker.state == "half_open"
+
+
+def test_only_upstream_failures_count(server):
+    request = httpx.Request("GET", ERGAST_TEST_URL)
+
+    def status_error(code):
+        return httpx.HTTPStatusError("", request=request, response=httpx.Response(code, request=request))
+
+    assert server.is_upstream_failure(status_error(503))
+    assert server.is_upstream_failure(status_error(429))
+    assert server.is_upstream_failure(httpx.ConnectError("refused"))
+    assert not server.is_upstream_failure(status_error(404))
+    assert not server.is_upstream_failure(KeyError("MRData"))
+
+
+def test_service_serves_last_known_good_then_fails_fast(server, monkeypatch):
+    monkeypatch.setattr(server, "ERGAST_RETRIES", 0)
+    upstream = {"down": False, "requests": 0}
+
+    def handler(request):
+        upstream["requests"] += 1
+        if upstream["down"]:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"MRData": {"round": "1"}})
+
+    async def scenario():
+        cache = server.ResponseCache(ttl=0, stale_ttl=0)
+        breaker = server.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        service = server.F1DataService(ERGAST_TEST_URL, httpx.MockTransport(handler), cache, breaker)
+        await service.start()
+        try:
+            await service._get_json("/current.json")
+            upstream["down"] = True
+            holder = {"age": None}
+            server.data_staleness.set(holder)
+            fallback = await service._get_json("/current.json")
+            await service._get_json("/current.json")
+            requests_when_open = upstream["requests"]
+            await service._get_json("/current.json")
+            with pytest.raises(server.UpstreamUnavailable):
+                await service._get_json("/current/driverStandings.json")
+            return fallback, holder, requests_when_open, breaker.state
+        finally:
+            await service.close()
+
+    fallback, holder, requests_when_open, state = asyncio.run(scenario())
+    assert fallback == {"MRData": {"round": "1"}}
+    assert holder["age"] is not None
+    assert state == "open"
+    assert upstream["requests"] == requests_when_open
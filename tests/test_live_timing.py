@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+
+def apply_delta(snapshot, delta):
+    """What a delta client does with a frame: merge fields, upsert rows by driver, drop removed drivers"""
+    rows = {row["driver"]: row for row in snapshot["positions"]}
+    rows.update({row["driver"]: row for row in delta["positions"]})
+    for driver in delta["removed"]:
+        rows.pop(driver, None)
+    return {**snapshot, **delta["changes"], "positions": sorted(rows.values(), key=lambda row: row["pos"])}
+
+
+PREVIOUS = {
+    "timestamp": "2025-03-02T15:00:00",
+    "lap": 12,
+    "positions": [
+        {"pos": 1, "driver": "VER", "gap": "+0.000"},
+        {"pos": 2, "driver": "NOR", "gap": "+1.204"},
+        {"pos": 3, "driver": "LEC", "gap": "+3.410"},
+    ],
+}
+
+
+def test_identical_snapshots_produce_an_empty_delta(server):
+    assert server.diff_timing(PREVIOUS, PREVIOUS) == {"changes": {}, "positions": [], "removed": []}
+
+
+def test_delta_carries_only_changed_fields_and_rows(server):
+    current = {
+        "timestamp": "2025-03-02T15:00:01",
+        "lap": 12,
+        "positions": [
+            {"pos": 1, "driver": "VER", "gap": "+0.000"},
+            {"pos": 2, "driver": "LEC", "gap": "+1.002"},
+            {"pos": 3, "driver": "PIA", "gap": "+2.870"},
+        ],
+    }
+    delta = server.diff_timing(PREVIOUS, current)
+    assert delta["changes"] == {"timestamp": "2025-03-02T15:00:01"}
+    assert [row["driver"] for row in delta["positions"]] == ["LEC", "PIA"]
+    assert delta["removed"] == ["NOR"]
+    assert apply_delta(PREVIOUS, delta) == current
+
+
+def write_replay(path, times):
+    path.write_text("".join(json.dumps({"t": t, "data": {"lap": index}}) + "\n" for index, t in enumerate(times)))
+    return str(path)
+
+
+def replay(server, monkeypatch, source, limit):
+    """Collect up to limit snapshots plus every pause the source asked for, without actually waiting"""
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def record_sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(server.asyncio, "sleep", record_sleep)
+
+    async def collect():
+        snapshots = []
+        async for snapshot in source.stream():
+            snapshots.append(snapshot)
+            if len(snapshots) == limit:
+                break
+        return snapshots
+
+    return asyncio.run(collect()), sleeps
+
+
+def test_live_timing_source_is_abstract(server):
+    with pytest.raises(TypeError):
+        server.LiveTimingSource()
+
+
+def test_replay_scales_recorded_gaps_by_speed(server, monkeypatch, tmp_path):
+    source = server.ReplayTimingSource(write_replay(tmp_path / "race.jsonl", [0, 2, 2, 7]), speed=10, loop=False)
+    snapshots, sleeps = replay(server, monkeypatch, source, limit=10)
+    assert snapshots == [{"lap": 0}, {"lap": 1}, {"lap": 2}, {"lap": 3}]
+    assert sleeps == pytest.approx([0, 0.2, 0, 0.5])
+
+
+def test_replay_without_speed_does_not_pause(server, monkeypatch, tmp_path):
+    for speed in (0, -1):
+        source = server.ReplayTimingSource(write_replay(tmp_path / "race.jsonl", [0, 30, 60]), speed=speed, loop=False)
+        snapshots, sleeps = replay(server, monkeypatch, source, limit=10)
+        assert [snapshot["lap"] for snapshot in snapshots] == [0, 1, 2]
+        assert sleeps == [0, 0, 0]
+
+
+def test_replay_loops_from_the_start(server, monkeypatch, tmp_path):
+    source = server.ReplayTimingSource(write_replay(tmp_path / "race.jsonl", [0, 1]), speed=0, loop=True)
+    snapshots, sleeps = replay(server, monkeypatch, source, limit=5)
+    assert [snapshot["lap"] for snapshot in snapshots] == [0, 1, 0, 1, 0]
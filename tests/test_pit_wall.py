@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+class RecordingBackend:
+    """LLM backend stand-in that records each prompt it is sent"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def complete(self, session_id, system_message, message):
+        self.prompts.append((session_id, message))
+        return f"answer to {message}"
+
+
+class CutOffBackend:
+    """Streams a couple of tokens and then loses the connection"""
+
+    async def stream(self, session_id, system_message, message):
+        yield "Box "
+        yield "this "
+        raise ConnectionError("stream reset")
+
+
+class ChatLog:
+    """chat_writer stand-in keeping what the route asked to store"""
+
+    def __init__(self):
+        self.chats = []
+
+    def add(self, document):
+        self.chats.append(document)
+
+
+@pytest.fixture
+def stream_chat(server, monkeypatch):
+    chat_log = ChatLog()
+    monkeypatch.setattr(server, "chat_writer", chat_log)
+
+    def post(backend, message="Who leads?"):
+        monkeypatch.setattr(server, "pit_wall", server.PitWallService(backend=backend))
+        response = TestClient(server.app).post(
+            "/api/pit-wall/chat/stream", json={"message": message, "session_id": "s1"})
+        return response, parse_events(response.text), chat_log.chats
+
+    return post
+
+
+def parse_events(body):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_cached_first_answers_reach_the_next_prompt(server):
+    async def scenario():
+        backend = RecordingBackend()
+        service = server.PitWallService(backend=backend, cache=server.PitWallResponseCache(server.DataVersion()))
+        first = await service.get_pit_wall_response("Who leads?", "a")
+        cached = await service.get_pit_wall_response("Who leads?", "b")
+        await service.get_pit_wall_response("By how much?", "b")
+        await service.get_pit_wall_response("And after Monaco?", "b")
+        return first, cached, backend.prompts
+
+    first, cached, prompts = asyncio.run(scenario())
+    assert cached == first
+    assert prompts[0] == ("a", "Who leads?")
+    # Session b's chat never saw its cache-served first exchange, so the next prompt carries it once
+    session, prompt = prompts[1]
+    assert session == "b"
+    assert f"User: Who leads?\nPit Wall: {first}" in prompt
+    assert prompt.endswith("User: By how much?")
+    assert prompts[2] == ("b", "And after Monaco?")
+
+
+
+def test_stream_sends_tokens_then_done_and_stores_the_reply(server, stream_chat):
+    backend = server.FakeLlmBackend(first_token_delay=0, token_delay=0)
+    response, events, chats = stream_chat(backend)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    reply = backend.reply("Who leads?")
+    tokens = [data["token"] for kind, data in events[:-1]]
+    assert {kind for kind, data in events[:-1]} == {"message"}
+    assert "".join(tokens) == reply
+    assert len(tokens) == len(reply.split(" "))
+    assert events[-1] == ("done", {"response": reply, "session_id": "s1"})
+    assert [(chat["session_id"], chat["message"], chat["response"]) for chat in chats] == [("s1", "Who leads?", reply)]
+
+
+def test_stream_failing_midway_reports_an_error_and_stores_nothing(stream_chat):
+    response, events, chats = stream_chat(CutOffBackend())
+    assert response.status_code == 200
+    assert events[:2] == [("message", {"token": "Box "}), ("message", {"token": "this "})]
+    assert [kind for kind, data in events[2:]] == ["error"]
+    assert chats == []
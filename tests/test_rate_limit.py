@@ -0,0 +1,34 @@
+import ipaddress
+
+
+def scope(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return {"type": "http", "path": "/api/", "client": (peer, 50000), "headers": headers}
+
+
+def middleware(server, *proxies):
+    return server.RateLimitMiddleware(None, trusted_proxies=[ipaddress.ip_network(proxy) for proxy in proxies])
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(server):
+    limiter = middleware(server)
+    assert limiter.client_key(scope("203.0.113.7", "10.0.0.1")) == "203.0.113.7"
+
+
+def test_client_is_the_rightmost_untrusted_hop(server):
+    limiter = middleware(server, "10.0.0.0/8")
+    # The leftmost entry is whatever the client sent; only hops added by trusted proxies count
+    assert limiter.client_key(scope("10.0.0.2", "1.2.3.4, 198.51.100.9, 10.0.0.5")) == "198.51.100.9"
+    assert limiter.client_key(scope("10.0.0.2")) == "10.0.0.2"
+
+
+def test_buckets_refill_over_time(server, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    limiter = server.RateLimiter()
+    capacity, refill = server.parse_rate("2/60")
+    waits = [limiter.take(("/api/", "client"), capacity, refill) for _ in range(3)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == 30.0
+    now[0] += 30
+    assert limiter.take(("/api/", "client"), capacity, refill) == 0.0
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+
+def test_concurrent_calls_share_one_fetch(server):
+    async def scenario():
+        flight = server.SingleFlight()
+        calls = []
+
+        async def fetch(path):
+            calls.append(path)
+            await asyncio.sleep(0.01)
+            return {"path": path}
+
+        results = await asyncio.gather(*(flight.do("/current.json", fetch, "/current.json") for _ in range(3)))
+        return results, calls, flight
+
+    results, calls, flight = asyncio.run(scenario())
+    assert results == [{"path": "/current.json"}] * 3
+    assert calls == ["/current.json"]
+    assert flight.coalesced == 2
+    assert flight.calls == {}
+
+
+def test_cancelled_caller_does_not_abort_the_shared_fetch(server):
+    async def scenario():
+        flight = server.SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "payload"
+
+        impatient = asyncio.create_task(flight.do("key", fetch))
+        patient = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        release.set()
+        return await patient, impatient
+
+    result, impatient = asyncio.run(scenario())
+    assert result == "payload"
+    assert impatient.cancelled()
+
+
+def test_errors_reach_every_caller_and_are_not_cached(server):
+    async def scenario():
+        flight = server.SingleFlight()
+        attempts = []
+
+        async def fetch():
+            attempts.append(1)
+            await asyncio.sleep(0)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(flight.do("key", fetch), flight.do("key", fetch), return_exceptions=True)
+        with pytest.raises(ValueError):
+            await flight.do("key", fetch)
+        return results, attempts
+
+    results, attempts = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(attempts) == 2
@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from .conftest import ERGAST_TEST_URL
+
+
+@pytest.fixture(autouse=True)
+def small_pages(server, monkeypatch):
+    # Nine recorded result rows over pages of four split every race across a page boundary
+    monkeypatch.setattr(server, "ERGAST_PAGE_SIZE", 4)
+
+
+def with_store(server, ergast, scenario):
+    async def run():
+        service = server.F1DataService(base_url=ERGAST_TEST_URL, transport=httpx.MockTransport(ergast))
+        await service.start()
+        try:
+            store = server.F1DataStore(AsyncMongoMockClient()["hyperacing_test"], service)
+            await store.ensure_indexes()
+            return await scenario(store)
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+def test_ingest_season_loads_every_collection(server, ergast):
+    async def scenario(store):
+        summary = await store.ingest_season("2024")
+        counts = [await collection.count_documents({}) for collection in (store.races, store.standings, store.drivers)]
+        races = await store.races.find({}, {"_id": 0, "round": 1, "results": 1}).sort("round", 1).to_list(length=None)
+        return summary, counts, races, store.seasons, store.current_season
+
+    summary, counts, races, seasons, current_season = with_store(server, ergast, scenario)
+    assert summary == {"season": 2024, "races": 3, "standings": 3, "drivers": 3}
+    assert counts == [3, 3, 3]
+    # Races split across result pages are merged back together
+    assert [(race["round"], len(race["results"])) for race in races] == [(1, 3), (2, 3), (3, 3)]
+    assert sum("/2024/results.json" in url for url in ergast.requests) == 3
+    assert seasons == [2024]
+    # A historical season alone never becomes the current one
+    assert current_season is None
+
+
+def test_current_routes_use_the_store_once_current_is_ingested(server, ergast):
+    async def scenario(store):
+        await store.ingest_season("current")
+        upstream_requests = len(ergast.requests)
+        standings = await store.get_current_standings()
+        details = await store.get_driver_details("norris")
+        first_page = await store.get_recent_races(limit=2)
+        second_page = await store.get_recent_races(limit=2, before=(2024, 2))
+        latest = await store.get_latest_race(top=2)
+        return upstream_requests, standings, details, first_page, second_page, latest, store.current_season
+
+    upstream_requests, standings, details, first_page, second_page, latest, current_season = with_store(server, ergast, scenario)
+    assert current_season == 2024
+    assert len(ergast.requests) == upstream_requests
+    assert [(driver["driver_id"], driver["points"]) for driver in standings] == [
+        ("max_verstappen", 65.0), ("leclerc", 58.0), ("norris", 51.0)]
+    assert details["driver_info"]["code"] == "NOR"
+    assert [[result["Driver"]["driverId"] for result in race["Results"]] for race in details["season_results"]] == [["norris"]] * 3
+    assert [race["round"] for race in first_page] == ["3", "2"]
+    assert [race["round"] for race in second_page] == ["1"]
+    assert latest["round"] == "3"
+    assert [result["code"] for result in latest["results"]] == ["LEC", "NOR"]
+
+
+def test_store_indexes_cover_the_read_paths(server, ergast):
+    async def scenario(store):
+        return [index["key"] for index in (
+            list((await store.races.index_information()).values())
+            + list((await store.standings.index_information()).values())
+            + list((await store.drivers.index_information()).values())
+        )]
+
+    keys = with_store(server, ergast, scenario)
+    assert [("season", -1), ("round", -1)] in keys
+    assert [("results.Driver.driverId", 1), ("season", -1)] in keys
+    assert [("season", -1), ("position", 1)] in keys
+    assert [("driver_id", 1), ("season", -1)] in keys
@@ -0,0 +1,85 @@
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+
+class RecordingCollection:
+    """insert_many stand-in that records batches and fails on demand"""
+
+    def __init__(self, failures=()):
+        self.batches = []
+        self.failures = list(failures)
+
+    async def insert_many(self, documents, ordered=True):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.batches.append([document["id"] for document in documents])
+
+
+def chats(count):
+    return [{"id": index, "session_id": "s1" if index % 2 else "s2"} for index in range(count)]
+
+
+def test_full_batches_flush_without_waiting_for_the_interval(server):
+    async def scenario():
+        collection = RecordingCollection()
+        buffer = server.WriteBehindBuffer(collection, batch_size=2, flush_interval=60)
+        buffer.start()
+        for chat in chats(3):
+            buffer.add(chat)
+        await asyncio.sleep(0.01)
+        flushed = list(collection.batches)
+        await buffer.stop()
+        return flushed, collection.batches, buffer.stats()
+
+    flushed, batches, stats = asyncio.run(scenario())
+    assert flushed == [[0, 1], [2]]
+    assert batches == [[0, 1], [2]]
+    assert stats["written"] == 3
+    assert stats["buffered"] == 0
+
+
+def test_buffered_documents_stay_readable_until_written(server):
+    buffer = server.WriteBehindBuffer(RecordingCollection(), batch_size=10)
+    for chat in chats(4):
+        buffer.add(chat)
+    assert [chat["id"] for chat in buffer.pending_for("session_id", "s1")] == [1, 3]
+
+
+def test_failed_batches_are_retried_in_order(server):
+    async def scenario():
+        collection = RecordingCollection(failures=[ConnectionError("mongo down")])
+        buffer = server.WriteBehindBuffer(collection, batch_size=2)
+        for chat in chats(3):
+            buffer.add(chat)
+        await buffer.flush()
+        kept = [chat["id"] for chat in buffer.pending]
+        await buffer.flush()
+        return kept, collection.batches, buffer.stats()
+
+    kept, batches, stats = asyncio.run(scenario())
+    assert kept == [0, 1, 2]
+    assert batches == [[0, 1], [2]]
+    assert stats["written"] == 3
+
+
+def test_per_document_write_errors_are_counted_not_retried(server):
+    async def scenario():
+        duplicate = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}], "nInserted": 1})
+        collection = RecordingCollection(failures=[duplicate])
+        buffer = server.WriteBehindBuffer(collection, batch_size=2)
+        for chat in chats(2):
+            buffer.add(chat)
+        await buffer.flush()
+        return buffer.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["written"], stats["failed"], stats["buffered"]) == (1, 1, 0)
+
+
+def test_oldest_documents_are_shed_once_the_buffer_is_full(server):
+    buffer = server.WriteBehindBuffer(RecordingCollection(), batch_size=10, max_buffer=3)
+    for chat in chats(5):
+        buffer.add(chat)
+    assert [chat["id"] for chat in buffer.pending] == [2, 3, 4]
+    assert buffer.stats()["dropped"] == 2